@@ -0,0 +1,141 @@
+"""Offline end-to-end benchmark of the research paths.
+
+Runs the actor's research code against the local Apify and LLM stand-ins of
+`benchmarks/fakes.py`, so throughput can be measured without spending Apify
+or Gemini credits. Each scenario researches a set of unique fake domains and
+reports the p50/p95 latency per domain and the domains researched per minute.
+
+Scenarios:
+    fast        research_domain in fast mode (the main.py helper path), one domain at a time
+    crew        research_domain with the agent crew, one domain at a time
+    batch-fast  research_domains in fast mode with --concurrency domains in flight
+    batch-crew  research_domains with crews, with --concurrency domains in flight
+
+Batch latencies are the `timings.total_secs` of the pushed records. Worker
+processes are not benchmarked, spawned workers would not get the fakes.
+
+Latencies are given as distribution specs (see fakes.Latency) in seconds of
+the real services and multiplied by --time-scale, so the defaults run ten
+times faster than production. Compare results at the same scale only.
+
+Usage:
+    python -m benchmarks.bench_research [--scenarios fast,batch-fast] [--domains N]
+        [--concurrency N] [--time-scale X] [--report-strategy single|map_reduce]
+        [--search-latency SPEC] [--scraper-latency SPEC] [--llm-latency SPEC] [--hedge]
+
+--hedge enables hedged Apify runs (APIFY_HEDGE_RUNS), compare the p95 with and
+without it on runs of more than HEDGE_MIN_SAMPLES domains.
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import List
+
+from benchmarks.fakes import (
+    FakeActor,
+    FakeApifyClient,
+    FakeGeminiClient,
+    Latency,
+    install_fakes,
+    load_sample,
+)
+
+SCENARIOS = ("fast", "crew", "batch-fast", "batch-crew")
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile, q between 0 and 100."""
+    ordered = sorted(values)
+    rank = max(1, round(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+async def run_sequential(actor, domains: List[str], mode: str, report_strategy: str) -> List[float]:
+    from src.main import build_research_crew, research_domain
+
+    research_crew = await build_research_crew(actor) if mode == "crew" else None
+    latencies = []
+    for domain in domains:
+        started = time.perf_counter()
+        await research_domain(actor, research_crew, domain, mode=mode, report_strategy=report_strategy)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+async def run_batch(actor, domains: List[str], mode: str, report_strategy: str, concurrency: int) -> List[float]:
+    from src.main import research_domains
+
+    dataset = await actor.open_dataset(name="agent-data")
+    pushed = len(dataset.items)
+    await research_domains(actor, domains, max_concurrency=concurrency, mode=mode, report_strategy=report_strategy)
+    records = dataset.items[pushed:]
+    failed = [record for record in records if "error" in record]
+    if failed:
+        raise RuntimeError(f"{len(failed)} domains failed, first error: {failed[0]['error']}")
+    return [record["timings"]["total_secs"] for record in records]
+
+async def run_scenario(scenario: str, actor, domains: List[str], args) -> List[float]:
+    mode = "crew" if scenario.endswith("crew") else "fast"
+    if scenario.startswith("batch"):
+        return await run_batch(actor, domains, mode, args.report_strategy, args.concurrency)
+    return await run_sequential(actor, domains, mode, args.report_strategy)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the research paths against local fakes")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--domains", type=int, default=10, help="Domains researched per scenario")
+    parser.add_argument("--concurrency", type=int, default=5, help="Domains in flight in batch scenarios")
+    parser.add_argument("--report-strategy", default="single", choices=("single", "map_reduce"))
+    parser.add_argument("--time-scale", type=float, default=0.1, help="Factor applied to every simulated latency")
+    parser.add_argument("--search-latency", default="lognormal:8,0.4", help="Google search scraper run duration")
+    parser.add_argument("--scraper-latency", default="lognormal:20,0.5", help="Profile scraper run duration")
+    parser.add_argument("--start-latency", default="uniform:0.3,1", help="Time to start an actor run")
+    parser.add_argument("--llm-latency", default="lognormal:6,0.3", help="Duration of one LLM call")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the latency samples")
+    parser.add_argument("--hedge", action="store_true", help="Hedge Apify runs slower than their p95")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(args.seed)
+
+    def latency(spec: str) -> Latency:
+        return Latency(spec, scale=args.time_scale, rng=rng)
+
+    sample = load_sample()
+    client = FakeApifyClient(sample, latency(args.search_latency), latency(args.scraper_latency),
+                             latency(args.start_latency))
+    actor = FakeActor(client)
+    gemini = FakeGeminiClient(sample["generated_report"], latency(args.llm_latency))
+    created = install_fakes(client, actor, gemini, crew_latency=latency(args.llm_latency))
+
+    # Measure the work, not the caches
+    from src.result_cache import result_cache
+    from tools.llm_api import llm_cache
+    result_cache.enabled = False
+    llm_cache.enabled = False
+    if args.hedge:
+        import src.apify_runner
+        src.apify_runner.HEDGE_RUNS = True
+
+    print(f"time scale {args.time_scale}, {args.domains} domains per scenario, "
+          f"batch concurrency {args.concurrency}, report strategy {args.report_strategy}")
+    print(f"{'scenario':<12}{'p50 s':>9}{'p95 s':>9}{'domains/min':>13}{'apify runs':>12}{'llm calls':>11}")
+    for scenario in args.scenarios.split(","):
+        if scenario not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario: {scenario}")
+        # Unique domains, so no result is shared with an earlier scenario
+        domains = [f"{scenario}-{index}.example.com" for index in range(args.domains)]
+        runs_before = client.run_count
+        llm_calls_before = gemini.calls + sum(llm.calls for llm in created["crew_llms"])
+        started = time.perf_counter()
+        # A failing scenario aborts the benchmark, its numbers must not go missing silently
+        latencies = asyncio.run(run_scenario(scenario, actor, domains, args))
+        elapsed = time.perf_counter() - started
+        llm_calls = gemini.calls + sum(llm.calls for llm in created["crew_llms"]) - llm_calls_before
+        print(
+            f"{scenario:<12}{percentile(latencies, 50):>9.2f}{percentile(latencies, 95):>9.2f}"
+            f"{len(latencies) / elapsed * 60:>13.1f}{client.run_count - runs_before:>12}{llm_calls:>11}"
+        )
+
+if __name__ == "__main__":
+    main()
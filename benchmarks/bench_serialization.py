@@ -0,0 +1,91 @@
+"""Micro-benchmark of cycle-safe serialization of scraped company data.
+
+Compares the previous approach, copying the data with `sanitize_data` and then
+serializing the copy with `json.dumps`, against `dumps_safe`. Inputs are built
+from `sample_response.json`: the record repeated to grow the payload, and the
+record nested to grow its depth, each with and without a reference cycle.
+
+Usage:
+    python -m benchmarks.bench_serialization [--repeat N]
+"""
+
+import argparse
+import copy
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.serialization import dumps_safe
+
+SAMPLE_PATH = Path(__file__).resolve().parent.parent / "sample_response.json"
+
+def sanitize_data(obj, seen=None):
+    """Previous implementation from src/main.py, kept here as the baseline."""
+    if seen is None:
+        seen = set()
+
+    if isinstance(obj, dict):
+        return {
+            key: sanitize_data(value, seen | {id(obj)})
+            for key, value in obj.items()
+            if id(value) not in seen
+        }
+    elif isinstance(obj, (list, tuple, set)):
+        return type(obj)(
+            sanitize_data(item, seen | {id(obj)})
+            for item in obj
+            if id(item) not in seen
+        )
+    else:
+        return obj
+
+def legacy_dumps(data) -> str:
+    return json.dumps(sanitize_data(data), separators=(",", ":"), ensure_ascii=False, default=str)
+
+def build_inputs(sample):
+    inputs = {}
+    for copies in (10, 100):
+        inputs[f"wide x{copies}"] = [copy.deepcopy(sample) for _ in range(copies)]
+    for depth in (50, 200):
+        nested = copy.deepcopy(sample)
+        for _ in range(depth):
+            nested = {"child": nested, "recent_news": sample["recent_news"]}
+        inputs[f"deep {depth}"] = nested
+
+    cyclic = [copy.deepcopy(sample) for _ in range(100)]
+    for record in cyclic:
+        record["linkedin_data"]["parent"] = record
+    inputs["wide x100 cyclic"] = cyclic
+    return inputs
+
+def measure(fn, data, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(data)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cycle-safe serialization")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per case")
+    args = parser.parse_args()
+
+    sample = json.loads(SAMPLE_PATH.read_text())
+    print(f"{'case':<20}{'legacy ms':>12}{'new ms':>10}{'speedup':>10}{'legacy MB':>12}{'new MB':>10}")
+    for name, data in build_inputs(sample).items():
+        assert json.loads(legacy_dumps(data)) == json.loads(dumps_safe(data))
+        legacy_time, legacy_peak = measure(legacy_dumps, data, args.repeat)
+        new_time, new_peak = measure(dumps_safe, data, args.repeat)
+        print(
+            f"{name:<20}{legacy_time * 1000:>12.1f}{new_time * 1000:>10.1f}{legacy_time / new_time:>9.1f}x"
+            f"{legacy_peak / 2**20:>12.1f}{new_peak / 2**20:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""Local stand-ins for Apify and the LLM providers used by offline benchmarks.
+
+The fakes sit at the boundaries the actor talks to, so everything between
+them runs unchanged: `run_actor`, profile discovery, single-flight, the tools
+and the tool loop, report generation and `tools/llm_api.py`. Payloads are
+derived from `sample_response.json` and every remote call waits for a delay
+drawn from a configurable latency distribution.
+
+- FakeApifyClient replaces the `ApifyClientAsync` returned by `actor.new_client()`
+- FakeActor replaces the Apify Actor, with in-memory datasets and key-value stores
+- FakeGeminiClient replaces the clients made by `tools.llm_api.create_llm_client`
+- FakeCrewLLM replaces the CrewAI LLM of every agent, it calls each of the
+  agent's tools once and then gives its final answer
+
+Key Classes:
+- Latency: Samples delays from a distribution given as a spec string
+- FakeApifyClient: Serves fixture datasets with simulated run latency
+- FakeActor: Actor stand-in with in-memory storages
+- FakeGeminiClient: Sync and async Gemini client stand-in
+- FakeCrewLLM: CrewAI LLM stand-in
+
+Key Functions:
+- install_fakes: Patches the fakes into the actor's modules
+"""
+
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from src.apify_runner import CRUNCHBASE_ACTOR, GOOGLE_SEARCH_ACTOR, LINKEDIN_ACTOR, PITCHBOOK_ACTOR
+from src.token_accounting import estimate_tokens
+
+SAMPLE_PATH = Path(__file__).resolve().parent.parent / "sample_response.json"
+
+# Source payload served by each scraper actor
+SCRAPER_SOURCES = {
+    LINKEDIN_ACTOR: "linkedin_data",
+    CRUNCHBASE_ACTOR: "crunchbase_data",
+    PITCHBOOK_ACTOR: "pitchbook_data",
+}
+
+# Number of chunks a streamed fake LLM response is split into
+STREAM_CHUNKS = 20
+
+class Latency:
+    """Delay distribution given as a spec string.
+
+    Specs:
+        fixed:S              always S seconds
+        uniform:LO,HI        uniform between LO and HI seconds
+        normal:MEAN,SD       normal, clipped at 0
+        lognormal:MEDIAN,SIGMA  log-normal with the given median, long right tail
+    """
+
+    def __init__(self, spec: str, scale: float = 1.0, rng: Optional[random.Random] = None):
+        """
+        Args:
+            spec: Distribution spec, see the class docstring
+            scale: Factor applied to every sample, e.g. 0.1 to run ten times faster
+            rng: Random generator, a shared seeded one makes runs repeatable
+        """
+        kind, _, params = spec.partition(":")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",") if value]
+        self.scale = scale
+        self.rng = rng or random.Random()
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        """Draw one delay in seconds."""
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = self.rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = max(0.0, self.rng.gauss(*self.params))
+        else:
+            median, sigma = self.params
+            value = median * self.rng.lognormvariate(0, sigma)
+        return value * self.scale
+
+    async def wait(self) -> None:
+        await asyncio.sleep(self.sample())
+
+def load_sample() -> Dict:
+    return json.loads(SAMPLE_PATH.read_text())
+
+def fake_profile_url(platform: str, domain: str) -> str:
+    """Profile URL of a domain on a platform, unique per domain."""
+    slug = re.sub(r"[^a-z0-9]+", "-", domain.lower())
+    return {
+        "linkedin": f"https://www.linkedin.com/company/{slug}",
+        "crunchbase": f"https://www.crunchbase.com/organization/{slug}",
+        "pitchbook": f"https://pitchbook.com/profiles/company/{slug}",
+    }[platform]
+
+class FakeApifyClient:
+    """Stand-in for ApifyClientAsync serving fixture datasets.
+
+    Google searches for `site:` profile queries return a profile URL unique to
+    the searched domain, other searches return the sample news articles. The
+    LinkedIn, Crunchbase and PitchBook scrapers return the sample payloads.
+    Starting a run takes a `start_latency` delay, waiting for it a delay of
+    `search_latency` or `scraper_latency`.
+    """
+
+    def __init__(self, sample: Dict, search_latency: Latency, scraper_latency: Latency, start_latency: Latency):
+        self.sample = sample
+        self.search_latency = search_latency
+        self.scraper_latency = scraper_latency
+        self.start_latency = start_latency
+        self.runs: Dict[str, tuple] = {}
+        self.run_count = 0
+        self._stores: Dict[str, Dict] = {}
+
+    def actor(self, actor_id: str):
+        return _FakeActorClient(self, actor_id)
+
+    def run(self, run_id: str):
+        return _FakeRunClient(self, run_id)
+
+    def key_value_stores(self):
+        return _FakeKeyValueStoreCollection(self)
+
+    def key_value_store(self, store_id: str):
+        return _FakeKeyValueStoreClient(self._stores.setdefault(store_id, {}))
+
+    def items_for(self, actor_id: str, run_input: Dict) -> List[Dict]:
+        if actor_id == GOOGLE_SEARCH_ACTOR:
+            return self._search_items(run_input["queries"].split("\n"))
+        source = SCRAPER_SOURCES.get(actor_id)
+        return [dict(self.sample[source])] if source else []
+
+    def _search_items(self, queries: List[str]) -> List[Dict]:
+        items = []
+        for query in queries:
+            profile_query = re.match(r"site:(\w+)\.com company (\S+)", query)
+            if profile_query:
+                platform, domain = profile_query.groups()
+                results = [{"title": domain, "url": fake_profile_url(platform, domain), "description": ""}]
+            else:
+                results = [
+                    {"title": article["title"], "url": article["url"], "description": article["description"],
+                     "emphasizedKeywords": article["emphasized_keywords"], "date": article["date"]}
+                    for article in self.sample["recent_news"]
+                ]
+            # The scraper returns one item per result page
+            for page in (1, 2):
+                items.append({"searchQuery": {"term": query, "page": page}, "organicResults": results})
+        return items
+
+class _FakeActorClient:
+    def __init__(self, client: FakeApifyClient, actor_id: str):
+        self.client = client
+        self.actor_id = actor_id
+
+    async def start(self, run_input: Dict, **_options) -> SimpleNamespace:
+        await self.client.start_latency.wait()
+        self.client.run_count += 1
+        run_id = f"fake-run-{self.client.run_count}"
+        self.client.runs[run_id] = (self.actor_id, run_input)
+        return SimpleNamespace(id=run_id, status="RUNNING")
+
+class _FakeRunClient:
+    def __init__(self, client: FakeApifyClient, run_id: str):
+        self.client = client
+        self.run_id = run_id
+
+    async def wait_for_finish(self, **_options) -> SimpleNamespace:
+        actor_id, _ = self.client.runs[self.run_id]
+        latency = self.client.search_latency if actor_id == GOOGLE_SEARCH_ACTOR else self.client.scraper_latency
+        await latency.wait()
+        return SimpleNamespace(id=self.run_id, status="SUCCEEDED")
+
+    async def abort(self, **_options) -> SimpleNamespace:
+        return SimpleNamespace(id=self.run_id, status="ABORTED")
+
+    def dataset(self):
+        return _FakeDatasetClient(self.client.items_for(*self.client.runs[self.run_id]))
+
+class _FakeDatasetClient:
+    def __init__(self, items: List[Dict]):
+        self._items = items
+
+    async def list_items(self, limit: Optional[int] = None, fields: Optional[List[str]] = None, **_options):
+        items = self._items[:limit] if limit else self._items
+        if fields:
+            items = [{key: value for key, value in item.items() if key in fields} for item in items]
+        return SimpleNamespace(items=items)
+
+class _FakeKeyValueStoreCollection:
+    def __init__(self, client: FakeApifyClient):
+        self.client = client
+
+    async def get_or_create(self, name: Optional[str] = None) -> SimpleNamespace:
+        return SimpleNamespace(id=name)
+
+class _FakeKeyValueStoreClient:
+    def __init__(self, records: Dict):
+        self.records = records
+
+    async def get_record(self, key: str) -> Optional[Dict]:
+        return {"key": key, "value": self.records[key]} if key in self.records else None
+
+    async def set_record(self, key: str, value, content_type: Optional[str] = None) -> None:
+        self.records[key] = value
+
+class FakeKeyValueStore:
+    """In-memory stand-in for an opened Apify key-value store."""
+
+    def __init__(self):
+        self.records: Dict = {}
+
+    async def get_value(self, key: str, default=None):
+        return self.records.get(key, default)
+
+    async def set_value(self, key: str, value, content_type: Optional[str] = None) -> None:
+        self.records[key] = value
+
+class FakeDataset:
+    """In-memory stand-in for an opened Apify dataset."""
+
+    def __init__(self):
+        self.items: List[Dict] = []
+
+    async def push_data(self, data) -> None:
+        self.items.extend(data if isinstance(data, list) else [data])
+
+    async def export_to(self, **_options) -> None:
+        pass
+
+class FakeActor:
+    """Stand-in for the Apify Actor with in-memory datasets and key-value stores."""
+
+    def __init__(self, client: FakeApifyClient):
+        self.client = client
+        self.log = logging.getLogger("benchmark.actor")
+        self.datasets: Dict[Optional[str], FakeDataset] = {}
+        self.stores: Dict[Optional[str], FakeKeyValueStore] = {}
+
+    def new_client(self) -> FakeApifyClient:
+        return self.client
+
+    async def open_dataset(self, name: Optional[str] = None) -> FakeDataset:
+        return self.datasets.setdefault(name, FakeDataset())
+
+    async def open_key_value_store(self, name: Optional[str] = None) -> FakeKeyValueStore:
+        return self.stores.setdefault(name, FakeKeyValueStore())
+
+    async def push_data(self, data) -> None:
+        await (await self.open_dataset()).push_data(data)
+
+    async def set_value(self, key: str, value, content_type: Optional[str] = None) -> None:
+        await (await self.open_key_value_store()).set_value(key, value)
+
+class FakeGeminiClient:
+    """Stand-in for the google-genai client, sync (`models`) and async (`aio.models`).
+
+    Every response is the sample report after an `llm_latency` delay. Streamed
+    responses spread the delay over STREAM_CHUNKS chunks. Token counts are
+    estimated from the prompt and the report.
+    """
+
+    def __init__(self, report: str, latency: Latency):
+        self.report = report
+        self.latency = latency
+        self.calls = 0
+        self.models = SimpleNamespace(
+            generate_content=self._generate_sync,
+            generate_content_stream=self._generate_stream_sync,
+        )
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self._generate,
+            generate_content_stream=self._generate_stream,
+        ))
+
+    def _response(self, prompt: str, text: str) -> SimpleNamespace:
+        return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(
+            prompt_token_count=estimate_tokens(prompt),
+            candidates_token_count=estimate_tokens(text),
+        ))
+
+    def _chunks(self) -> List[str]:
+        size = len(self.report) // STREAM_CHUNKS + 1
+        return [self.report[start:start + size] for start in range(0, len(self.report), size)]
+
+    def _generate_sync(self, model: str, contents: str) -> SimpleNamespace:
+        self.calls += 1
+        time.sleep(self.latency.sample())
+        return self._response(contents, self.report)
+
+    def _generate_stream_sync(self, model: str, contents: str):
+        self.calls += 1
+        chunks = self._chunks()
+        delay = self.latency.sample() / len(chunks)
+        for chunk in chunks:
+            time.sleep(delay)
+            yield self._response(contents, chunk)
+
+    async def _generate(self, model: str, contents: str) -> SimpleNamespace:
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        return self._response(contents, self.report)
+
+    async def _generate_stream(self, model: str, contents: str):
+        self.calls += 1
+        chunks = self._chunks()
+        delay = self.latency.sample() / len(chunks)
+
+        async def stream():
+            for chunk in chunks:
+                await asyncio.sleep(delay)
+                yield self._response(contents, chunk)
+
+        return stream()
+
+def _tool_input(tool_name: str, domain: str) -> Dict:
+    # Newer CrewAI versions list tools under snake_case names, e.g. linked_in_...
+    name = re.sub(r"[^a-z0-9]+", "", tool_name.lower())
+    if name == "googlesearch":
+        return {"query": f"{domain} company"}
+    for platform in ("linkedin", "crunchbase", "pitchbook"):
+        if name.startswith(platform):
+            return {"url": fake_profile_url(platform, domain)}
+    return {"domain": domain}
+
+def _make_crew_llm_class():
+    from crewai.llms.base_llm import BaseLLM
+
+    class FakeCrewLLM(BaseLLM):
+        """CrewAI LLM stand-in answering in the ReAct text format.
+
+        The agent's tools are read from its system prompt. Each one is called
+        once, with the task's domain or the fake profile URL as input, then
+        the final answer is given. Every call takes an `llm_latency` delay.
+        """
+
+        latency: Latency
+        answer: str
+        calls: int = 0
+
+        def supports_function_calling(self) -> bool:
+            return False
+
+        def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs) -> str:
+            self.calls += 1
+            time.sleep(self.latency.sample())
+            if isinstance(messages, str):
+                messages = [{"role": "user", "content": messages}]
+            text = "\n".join(str(message.get("content", "")) for message in messages)
+            tool_names = re.findall(r"^Tool Name: (.+)$", text, re.MULTILINE)
+            # The format instructions show an example observation, skip it
+            called = len(re.findall(r"^Observation:(?! the result of the action)", text, re.MULTILINE))
+            domain = re.search(r"domain name: ([\w.-]+)", text)
+            if domain and called < len(tool_names):
+                tool_name = tool_names[called].strip()
+                return (f"Thought: I should use the {tool_name} tool\nAction: {tool_name}\n"
+                        f"Action Input: {json.dumps(_tool_input(tool_name, domain.group(1).rstrip('.')))}")
+            return f"Thought: I now know the final answer\nFinal Answer: {self.answer}"
+
+    return FakeCrewLLM
+
+def install_fakes(client: FakeApifyClient, actor: FakeActor, gemini: FakeGeminiClient,
+                  crew_latency: Optional[Latency] = None) -> Dict[str, list]:
+    """Patch the fakes into the actor's modules.
+
+    - `src.main.Actor` becomes the fake actor, scrapers reach the fake Apify
+      client through `actor.new_client()`
+    - `tools.llm_api.create_llm_client` returns the fake Gemini client
+    - With crew_latency, every crew agent gets a FakeCrewLLM
+
+    Args:
+        client: Fake Apify client
+        actor: Fake actor returning the client
+        gemini: Fake Gemini client
+        crew_latency: Delay of each crew LLM call, None keeps the CrewAI LLM
+
+    Returns:
+        Dict with the list of fake crew LLMs created, under "crew_llms"
+    """
+    import src.main
+    import tools.llm_api
+    from src.company_research_crew import CompanyResearchCrew
+
+    src.main.Actor = actor
+    tools.llm_api.create_llm_client = lambda provider="gemini", google_gemini_api_key=None: gemini
+    tools.llm_api._clients.clear()
+    tools.llm_api._async_clients.clear()
+
+    created = {"crew_llms": []}
+    if crew_latency is not None:
+        llm_class = _make_crew_llm_class()
+        answer = client.sample["generated_report"][:2000]
+
+        def build_llm(self):
+            llm = llm_class(model="fake/crew-llm", latency=crew_latency, answer=answer)
+            created["crew_llms"].append(llm)
+            return llm
+
+        CompanyResearchCrew._build_llm = build_llm
+    return created
@@ -0,0 +1,409 @@
+"""Shared Apify actor invocation layer used by all scrapers.
+
+Every scraper in this project starts an Apify actor, waits for the run to
+finish and reads items from its default dataset. This module does that in one
+place:
+
+- One pooled `ApifyClientAsync` per event loop, reused by every call so HTTP
+  connections stay open between runs
+- Per-actor run settings (timeout, memory and deadline) in `ACTOR_SETTINGS`
+- Dataset projection with `limit`, `fields` and `clean`, so only the items and
+  fields a caller needs are transferred
+- A TTL result cache consulted before any run is started (`src/result_cache.py`)
+- Single-flight coalescing, so identical concurrent calls share one run and
+  a complete result is reused for a few minutes, unless the result cache is
+  disabled
+- Record/replay of every call through the cassette of `tools/cassette.py`
+- A process-wide budget of concurrent runs (`tools/rate_limiter.py`). Runs
+  wait for a slot, and starts rejected over rate or memory limits shrink the
+  budget and are retried after a backoff, a bounded number of times
+- Deadlines: a call waits at most `deadline_secs` from the moment its first
+  run gets a run slot, then aborts the remote run and returns the items
+  scraped so far
+- Bounded retries with jittered backoff of runs that fail to start or fail,
+  and optional hedging with a second run once the first is past the actor's p95
+- An "apify" tracing span per call with the run id, item count, estimated bytes and the
+  time spent starting, waiting for and reading the run
+
+Key Functions:
+- get_apify_client: Returns the pooled client for the running event loop
+- run_actor: Runs an actor and returns the requested dataset items
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.result_cache import make_cache_key, result_cache
+from src.single_flight import SingleFlight
+from src.tracing import payload_bytes, span, tracing_active
+from tools.cassette import cassette
+from tools.rate_limiter import MAX_THROTTLE_RETRIES, is_throttle_error, rate_limiter
+
+GOOGLE_SEARCH_ACTOR = "apify/google-search-scraper"
+LINKEDIN_ACTOR = "pratikdani/linkedin-company-profile-scraper"
+CRUNCHBASE_ACTOR = "pratikdani/crunchbase-companies-scraper"
+PITCHBOOK_ACTOR = "pratikdani/pitchbook-companies-scraper"
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Run options per actor. `timeout_secs` caps the run on the platform and
+# `memory_mbytes` overrides the actor's default memory, None keeps the default.
+# `deadline_secs` is how long a caller waits for the result, including retries,
+# before the run is aborted and the items scraped so far are returned.
+# `cache_ttl_secs` is how long results stay in the result cache, 0 disables it.
+ACTOR_SETTINGS: Dict[str, Dict] = {
+    GOOGLE_SEARCH_ACTOR: {"timeout_secs": 180, "memory_mbytes": None, "deadline_secs": 120,
+                          "cache_ttl_secs": 12 * HOUR},
+    LINKEDIN_ACTOR: {"timeout_secs": 300, "memory_mbytes": None, "deadline_secs": 240, "cache_ttl_secs": 7 * DAY},
+    CRUNCHBASE_ACTOR: {"timeout_secs": 300, "memory_mbytes": None, "deadline_secs": 240, "cache_ttl_secs": 7 * DAY},
+    PITCHBOOK_ACTOR: {"timeout_secs": 300, "memory_mbytes": None, "deadline_secs": 240, "cache_ttl_secs": 7 * DAY},
+}
+
+# Runs that fail to start or do not succeed are retried after a jittered
+# exponential backoff, up to MAX_ATTEMPTS runs in total
+MAX_ATTEMPTS = 3
+RETRY_BASE_SECS = 2
+# Any other final status (FAILED, ABORTED, TIMED-OUT) leaves an incomplete
+# dataset, which is never returned as a result
+SUCCEEDED_RUN_STATUS = "SUCCEEDED"
+
+# With hedging, a second run is started once the first has taken longer than
+# the p95 of the last HEDGE_HISTORY_SIZE successful runs of the actor. Nothing
+# is hedged before HEDGE_MIN_SAMPLES runs were seen. Set APIFY_HEDGE_RUNS=1 to
+# enable it, hedged runs cost platform credits.
+HEDGE_RUNS = os.getenv('APIFY_HEDGE_RUNS', '0') == '1'
+HEDGE_MIN_SAMPLES = 20
+HEDGE_HISTORY_SIZE = 200
+
+# Identical calls share one run while in flight and its complete result for a
+# few minutes after
+IN_FLIGHT_LINGER_SECS = 5 * 60
+_in_flight = SingleFlight(linger_secs=IN_FLIGHT_LINGER_SECS)
+
+# HTTP clients are bound to the event loop they were first used on
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+
+def get_apify_client(actor):
+    """Return the pooled Apify client for the running event loop.
+
+    Args:
+        actor: Apify Actor instance used to configure the client
+
+    Returns:
+        ApifyClientAsync shared by every call made on this event loop
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = actor.new_client()
+        _clients[loop] = client
+    return client
+
+async def _start_run(client, actor_id: str, **options):
+    """Start an actor run, waiting out platform rate and memory limit rejections.
+
+    Rejections are retried up to MAX_THROTTLE_RETRIES times, then raised.
+    """
+    retries = 0
+    while True:
+        try:
+            actor_run = await client.actor(actor_id).start(**options)
+        except Exception as e:
+            if not is_throttle_error(e):
+                raise
+            pause = rate_limiter.apify_throttled(e)
+            if retries >= MAX_THROTTLE_RETRIES:
+                raise
+            retries += 1
+            await asyncio.sleep(pause)
+            continue
+        rate_limiter.apify_started()
+        return actor_run
+
+class RunDurations:
+    """Recent durations of successful runs per actor, for the hedging threshold."""
+
+    def __init__(self, max_samples: int = HEDGE_HISTORY_SIZE):
+        self._durations: Dict[str, deque] = {}
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+
+    def add(self, actor_id: str, duration: float) -> None:
+        with self._lock:
+            self._durations.setdefault(actor_id, deque(maxlen=self._max_samples)).append(duration)
+
+    def p95(self, actor_id: str) -> Optional[float]:
+        """Return the p95 run duration, None before HEDGE_MIN_SAMPLES runs were seen."""
+        with self._lock:
+            durations = sorted(self._durations.get(actor_id, ()))
+        if len(durations) < HEDGE_MIN_SAMPLES:
+            return None
+        return durations[max(0, round(0.95 * len(durations)) - 1)]
+
+_run_durations = RunDurations()
+
+def _is_retryable(error: BaseException) -> bool:
+    # Rejected requests (invalid input, missing actor, ...) fail the same way again
+    status = getattr(error, "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500)
+
+def _retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter around it, attempt counts from 1."""
+    return RETRY_BASE_SECS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+
+async def _run_to_finish(client, actor_id: str, options: Dict, run_ids: List[str],
+                         on_slot: Callable[[], None]) -> Tuple[Any, Dict]:
+    """Start a run in a run slot and wait for it to finish.
+
+    on_slot is called once the run slot is granted. The run id is appended to
+    run_ids as soon as it is known, so the caller can abort the run if this
+    coroutine is cancelled.
+
+    Returns:
+        Tuple of the finished run and the seconds spent waiting for a run
+        slot, starting the run and waiting for it to finish
+
+    Raises:
+        RuntimeError: If the run could not be started or did not succeed
+    """
+    started = time.monotonic()
+    async with rate_limiter.apify_run():
+        timings = {"slot_wait_secs": round(time.monotonic() - started, 3)}
+        on_slot()
+        started = time.monotonic()
+        actor_run = await _start_run(client, actor_id, **options)
+        if actor_run is None:
+            raise RuntimeError('Actor task failed to start.')
+        run_ids.append(actor_run.id)
+        timings["run_start_secs"] = round(time.monotonic() - started, 3)
+        waited = time.monotonic()
+        finished_run = await client.run(actor_run.id).wait_for_finish() or actor_run
+        timings["wait_secs"] = round(time.monotonic() - waited, 3)
+    status = finished_run.status
+    if status != SUCCEEDED_RUN_STATUS:
+        raise RuntimeError(f'Actor run {actor_run.id} of {actor_id} finished with status {status}.')
+    _run_durations.add(actor_id, time.monotonic() - started)
+    return finished_run, timings
+
+async def _abort_runs(client, run_ids: List[str]) -> None:
+    """Abort runs, ignoring errors of runs that already finished."""
+    await asyncio.gather(*(client.run(run_id).abort() for run_id in run_ids), return_exceptions=True)
+
+class RunDeadline:
+    """Deadline of a run_actor call, started when its first run gets a run slot.
+
+    Time spent queued for a slot under the rate limiter's backpressure does
+    not count against the deadline, a busy batch waits instead of losing data.
+    """
+
+    def __init__(self, deadline_secs: Optional[float]):
+        self.deadline_secs = deadline_secs
+        self.started_at: Optional[float] = None
+
+    def start(self) -> None:
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+    @property
+    def at(self) -> Optional[float]:
+        """time.monotonic() of the deadline, None while not started or without deadline."""
+        if not self.deadline_secs or self.started_at is None:
+            return None
+        return self.started_at + self.deadline_secs
+
+async def _race_runs(client, actor_id: str, options: Dict, deadline: RunDeadline,
+                     hedge_after: Optional[float], run_ids: List[str]) -> Tuple[Optional[Tuple[Any, Dict]], bool]:
+    """Run an actor once, hedged with a second run if the first is slow.
+
+    The second run is started once the first has run for hedge_after seconds
+    since it got its run slot. The first run to succeed wins, the caller
+    aborts the other one.
+
+    Returns:
+        Tuple of the result of _run_to_finish, None if the deadline passed
+        first, and whether a hedging run was started
+
+    Raises:
+        RuntimeError: If every started run failed
+    """
+    slot_granted = asyncio.get_running_loop().create_future()
+
+    def on_slot() -> None:
+        deadline.start()
+        if not slot_granted.done():
+            slot_granted.set_result(time.monotonic())
+
+    pending = {asyncio.create_task(_run_to_finish(client, actor_id, options, run_ids, on_slot))}
+    hedged = False
+    try:
+        while True:
+            timeouts = []
+            if deadline.at is not None:
+                timeouts.append(deadline.at - time.monotonic())
+            hedge_at = slot_granted.result() + hedge_after if hedge_after is not None and slot_granted.done() else None
+            if hedge_at is not None and not hedged:
+                timeouts.append(hedge_at - time.monotonic())
+            timeout = max(0.0, min(timeouts)) if timeouts else None
+            # Also woken when the first slot is granted, which starts the clocks
+            waiting = pending if slot_granted.done() else pending | {slot_granted}
+            done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            done.discard(slot_granted)
+            pending -= done
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), hedged
+            if done and not pending:
+                raise next(iter(done)).exception()
+            if deadline.at is not None and time.monotonic() >= deadline.at:
+                return None, hedged
+            if hedge_at is not None and not hedged and time.monotonic() >= hedge_at:
+                hedged = True
+                pending.add(asyncio.create_task(_run_to_finish(client, actor_id, options, run_ids, on_slot)))
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def run_actor(
+    actor,
+    actor_id: str,
+    run_input: Dict,
+    *,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    clean: bool = True,
+    timeout_secs: Optional[int] = None,
+    memory_mbytes: Optional[int] = None,
+    deadline_secs: Optional[float] = None,
+    cache_ttl_secs: Optional[int] = None,
+    hedge: Optional[bool] = None,
+) -> List[Dict]:
+    """Run an Apify actor and return items from its default dataset.
+
+    Args:
+        actor: Apify Actor instance
+        actor_id: ID of the actor to run, e.g. "apify/google-search-scraper"
+        run_input: Input for the actor run
+        limit: Maximum number of dataset items to fetch
+        fields: Only fetch these fields of each dataset item
+        clean: Skip empty items and hidden fields
+        timeout_secs: Run timeout, overrides ACTOR_SETTINGS
+        memory_mbytes: Run memory, overrides ACTOR_SETTINGS
+        deadline_secs: Seconds to wait for the result once a run slot is granted, overrides
+            ACTOR_SETTINGS, 0 waits indefinitely
+        cache_ttl_secs: Maximum age of a cached result, overrides ACTOR_SETTINGS
+        hedge: Start a second run when the first is past the actor's p95, defaults to APIFY_HEDGE_RUNS
+
+    Returns:
+        List of dataset items, only the items scraped before the deadline if
+        it passed
+
+    Raises:
+        RuntimeError: If no run could be started or succeeded within MAX_ATTEMPTS
+    """
+    settings = ACTOR_SETTINGS.get(actor_id, {})
+    if timeout_secs is None:
+        timeout_secs = settings.get("timeout_secs")
+    if memory_mbytes is None:
+        memory_mbytes = settings.get("memory_mbytes")
+    if deadline_secs is None:
+        deadline_secs = settings.get("deadline_secs")
+    if hedge is None:
+        hedge = HEDGE_RUNS
+    if cache_ttl_secs is None:
+        cache_ttl_secs = settings.get("cache_ttl_secs")
+
+    client = get_apify_client(actor)
+    cache_key = make_cache_key(actor_id, run_input, limit=limit, fields=fields, clean=clean)
+
+    async def fetch() -> List[Dict]:
+        # Recorded runs always go to the platform, so cassettes hold real latencies
+        cached = None if cassette.recording else await result_cache.get(client, cache_key, cache_ttl_secs)
+        if cached is not None:
+            trace_span.set(source="cache")
+            return cached
+
+        deadline = RunDeadline(deadline_secs)
+        hedge_after = _run_durations.p95(actor_id) if hedge else None
+        options = {
+            "run_input": run_input,
+            "run_timeout": timedelta(seconds=timeout_secs) if timeout_secs else None,
+            "memory_mbytes": memory_mbytes,
+        }
+        attempt = 0
+        while True:
+            attempt += 1
+            run_ids: List[str] = []
+            try:
+                winner, hedged = await _race_runs(client, actor_id, options, deadline, hedge_after, run_ids)
+                break
+            except asyncio.CancelledError:
+                # The caller gave up, do not leave its runs scraping on the platform
+                await _abort_runs(client, run_ids)
+                raise
+            except Exception as e:
+                delay = _retry_delay(attempt)
+                if (attempt >= MAX_ATTEMPTS or not _is_retryable(e)
+                        or (deadline.at is not None and time.monotonic() + delay >= deadline.at)):
+                    raise
+                await asyncio.sleep(delay)
+        trace_span.set(source="run", attempts=attempt, hedged=hedged)
+
+        if winner is None:
+            # Past the deadline, abort and return what the first run scraped so far
+            await _abort_runs(client, run_ids)
+            trace_span.set(partial=True)
+            # Partial results are only shared with the calls already waiting
+            _in_flight.forget(cache_key)
+            if not run_ids:
+                return []
+            run_id = run_ids[0]
+        else:
+            finished_run, timings = winner
+            run_id = finished_run.id
+            trace_span.set(status=finished_run.status, **timings)
+            # The losing run of a hedged race
+            await _abort_runs(client, [other for other in run_ids if other != run_id])
+        trace_span.set(run_id=run_id)
+
+        dataset_client = client.run(run_id).dataset()
+        started = time.monotonic()
+        items = await dataset_client.list_items(limit=limit, fields=fields, clean=clean)
+        trace_span.set(list_items_secs=round(time.monotonic() - started, 3))
+        if winner is not None:
+            # Partial results are never cached
+            await result_cache.set(client, cache_key, cache_ttl_secs, items.items)
+        return items.items
+
+    async def fetch_shared() -> List[Dict]:
+        # With the cache disabled, every call gets fresh data of its own
+        if not result_cache.enabled:
+            return await fetch()
+        return await _in_flight.do(cache_key, fetch)
+
+    # Calls joining an identical in-flight run are marked "shared", the span
+    # of the call that started the run carries its details
+    with span("apify", actor_id, source="shared") as trace_span:
+        cassette_key = cassette.make_key(actor_id, run_input, limit, fields, clean) if cassette.mode else None
+        if cassette.replaying:
+            trace_span.set(source="cassette")
+            items = await cassette.play_async(cassette.take("apify", cassette_key))
+        elif cassette.recording:
+            recording = cassette.start_recording("apify", cassette_key, {
+                "actor_id": actor_id, "run_input": run_input, "limit": limit, "fields": fields, "clean": clean,
+            })
+            items = await fetch_shared()
+            recording.save(items)
+        else:
+            items = await fetch_shared()
+        trace_span.set(items=len(items))
+        if tracing_active():
+            trace_span.set(bytes=payload_bytes(items))
+        return items
@@ -0,0 +1,136 @@
+"""Compaction of scraped company data before it is sent to an LLM.
+
+Scraper payloads carry many fields the report never uses: employee lists,
+similar pages, image URLs, patents, FAQs and so on. This module keeps only the
+fields each source's report sections rely on, truncates long lists and strings,
+and serializes without whitespace. `compact_record` then shrinks the limits
+step by step until the payload fits a token budget. Compaction is cycle-safe:
+entries pointing back to one of their ancestors are dropped on the way.
+
+Key Functions:
+- compact_source: Compacts the payload of a single source
+- compact_record: Compacts and serializes a full company record within a token budget
+- dumps_compact: Serializes data without whitespace
+"""
+
+import os
+from typing import Any, Dict, Optional, Set, Tuple
+
+from src.serialization import CONTAINERS, dumps_safe
+from src.token_accounting import estimate_tokens
+
+# Fields kept per source, every other field is dropped
+SOURCE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "linkedin_data": (
+        "company_name", "description", "industry", "specialities", "company_type", "founded_year",
+        "employees", "headcount", "followers", "hq_address", "location", "website", "funding",
+        "stock_info", "investors", "result_type",
+    ),
+    "crunchbase_data": (
+        "name", "legal_name", "about", "full_description", "founded_date", "operating_status",
+        "company_type", "ipo_status", "stock_symbol", "address", "website", "num_employees",
+        "industries", "founders", "current_employees", "financials_highlights", "funding_rounds",
+        "funding_timeline", "investors", "num_investors", "acquisitions", "num_acquisitions",
+        "products_and_services", "similar_companies", "builtwith_tech", "monthly_visits",
+        "monthly_visits_growth", "social_media_links", "result_type",
+    ),
+    "pitchbook_data": (
+        "company_name", "description", "year_founded", "employees", "status", "latest_deal_type",
+        "financing_rounds", "investors", "investments", "all_investments", "competitors",
+        "contact_information", "company_socials", "result_type",
+    ),
+    "recent_news": ("title", "url", "description", "date"),
+    "search_results": ("title", "url", "description"),
+}
+
+# Top-level fields of a company record sent to the LLM
+RECORD_FIELDS = (
+    "domain", "data_collection_date", "linkedin_url", "pitchbook_url", "crunchbase_url",
+    "recent_news", "linkedin_data", "crunchbase_data", "pitchbook_data", "funding_analysis",
+)
+
+# Nested keys that only hold images, tracking ids or other noise
+DROPPED_KEYS = {"image", "image_id", "img", "thumbnail_url", "logo", "uuid", "permalink", "input"}
+
+DEFAULT_MAX_LIST_ITEMS = 10
+DEFAULT_MAX_STRING_CHARS = 1000
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "12000"))
+
+def dumps_compact(data: Any) -> str:
+    """Serialize data as JSON without whitespace."""
+    return dumps_safe(data)
+
+def _compact_value(value: Any, max_list_items: int, max_string_chars: int, path: Set[int]) -> Any:
+    # `path` holds the containers currently being compacted, to skip cycles
+    if isinstance(value, str):
+        return value[:max_string_chars] + "..." if len(value) > max_string_chars else value
+    if not isinstance(value, CONTAINERS):
+        return value
+
+    path.add(id(value))
+    if isinstance(value, dict):
+        compacted = {}
+        for key, item in value.items():
+            if key in DROPPED_KEYS or (key.endswith("_url") and key != "profile_url") or id(item) in path:
+                continue
+            item = _compact_value(item, max_list_items, max_string_chars, path)
+            if item not in (None, "", [], {}):
+                compacted[key] = item
+    else:
+        compacted = [
+            _compact_value(item, max_list_items, max_string_chars, path)
+            for item in list(value)[:max_list_items]
+            if id(item) not in path
+        ]
+    path.discard(id(value))
+    return compacted
+
+def compact_source(source: str, payload: Any, max_list_items: int = DEFAULT_MAX_LIST_ITEMS,
+                   max_string_chars: int = DEFAULT_MAX_STRING_CHARS) -> Any:
+    """Keep only the allowlisted fields of a source payload and truncate it.
+
+    Args:
+        source: Source name, a key of SOURCE_FIELDS
+        payload: Scraped payload, a dict or a list of dicts
+        max_list_items: Maximum number of items kept in any list
+        max_string_chars: Maximum length of any string
+
+    Returns:
+        Compacted payload
+    """
+    fields = SOURCE_FIELDS.get(source)
+    if fields is not None:
+        if isinstance(payload, dict):
+            payload = {key: payload[key] for key in fields if key in payload}
+        elif isinstance(payload, list):
+            payload = [
+                {key: item[key] for key in fields if key in item} if isinstance(item, dict) else item
+                for item in payload
+            ]
+    return _compact_value(payload, max_list_items, max_string_chars, set())
+
+def compact_record(record: Dict, token_budget: Optional[int] = None) -> str:
+    """Compact and serialize a company record so it fits a token budget.
+
+    List and string limits are halved until the serialized record fits the
+    budget or cannot shrink any further.
+
+    Args:
+        record: Company record shaped like sample_response.json
+        token_budget: Maximum estimated tokens, defaults to DEFAULT_TOKEN_BUDGET
+
+    Returns:
+        Whitespace-free JSON of the compacted record
+    """
+    token_budget = DEFAULT_TOKEN_BUDGET if token_budget is None else token_budget
+    max_list_items, max_string_chars = DEFAULT_MAX_LIST_ITEMS, DEFAULT_MAX_STRING_CHARS
+    while True:
+        compacted = {
+            key: compact_source(key, record[key], max_list_items, max_string_chars)
+            for key in RECORD_FIELDS if key in record
+        }
+        serialized = dumps_compact(compacted)
+        if estimate_tokens(serialized) <= token_budget or (max_list_items <= 1 and max_string_chars <= 100):
+            return serialized
+        max_list_items = max(1, max_list_items // 2)
+        max_string_chars = max(100, max_string_chars // 2)
@@ -9,7 +9,10 @@ from src.company_research_tools import (
     PitchBookScraperTool,
     GoogleSearchTool,
 )
+from tools.cassette import wrap_llm_call
+from tools.rate_limiter import limit_llm_call
 from pydantic import ConfigDict
+from typing import Dict
 import os
 from dotenv import load_dotenv
 import logging
@@ -19,41 +22,103 @@ os.environ['CREWAI_LOGGING'] = 'ERROR'
 
 load_dotenv()
 
+CREW_MODEL = "gemini/gemini-2.0-flash-lite"
+
 @CrewBase
 class CompanyResearchCrew:
     """Crew for comprehensive company research"""
     
     def __init__(self, actor):
+        # CrewBase sets the crew up around __init__, there is no base class to initialize
         self.actor = actor
-        # Initialize Gemini LLM
-        self.llm = LLM(
-            model="gemini/gemini-2.0-flash-lite",
+
+    def _build_llm(self) -> LLM:
+        # Each agent gets its own Gemini LLM so its token usage is tracked separately
+        llm = LLM(
+            model=CREW_MODEL,
             temperature=0.7,
             api_key=os.getenv("GOOGLE_API_KEY"),  # Make sure to set this in your .env file
             verbose=False  # Suppress LLM output
         )
-        super().__init__()
+        # Records or replays the agent's exchanges when CASSETTE_MODE is set,
+        # calls that reach the provider wait for the process-wide LLM budgets
+        return wrap_llm_call(limit_llm_call(llm), CREW_MODEL)
+
+    def agent_token_usage(self) -> Dict[str, Dict[str, int]]:
+        """Return the cumulative token usage of every agent's LLM.
+
+        Counters grow across kickoffs of this crew, take the difference of two
+        snapshots to get the usage of a single run.
+
+        Returns:
+            Dict mapping each agent role to its input_tokens, output_tokens and requests
+        """
+        usage = {}
+        for member in (*self._research_agents(), self.data_analyst(), self.content_compiler()):
+            get_summary = getattr(member.llm, "get_token_usage_summary", None)
+            summary = get_summary() if get_summary else member._token_process.get_summary()
+            usage[member.role] = {
+                "input_tokens": summary.prompt_tokens,
+                "output_tokens": summary.completion_tokens,
+                "requests": summary.successful_requests,
+            }
+        return usage
     
-    @agent
-    def researcher(self) -> Agent:
+    def _source_researcher(self, role: str, goal: str, tools: list) -> Agent:
+        # One researcher per source, so the sources can be researched concurrently
         return Agent(
-            role="Company Research Specialist",
-            goal="Gather comprehensive information about companies from various sources. Use the tools provided to gather information.",
+            role=role,
+            goal=goal,
             backstory="""You are an expert business researcher with years of experience
             in gathering and analyzing company information. You excel at finding accurate
             and relevant details about organizations, their products, and market presence.""",
+            tools=tools,
+            llm=self._build_llm(),
+            verbose=False  # Suppress agent output
+        )
+
+    @agent
+    def news_researcher(self) -> Agent:
+        return self._source_researcher(
+            role="Company News Researcher",
+            goal="Find recent news and developments about companies. Use the tools provided to gather information.",
             tools=[
-                # SerperDevTool(),
-                # WikipediaTools(),
                 CompanyNewsSearchTool(actor=self.actor),
-                ProfessionalProfilesTool(actor=self.actor),
-                LinkedInScraperTool(actor=self.actor),
-                CrunchbaseScraperTool(actor=self.actor),
-                PitchBookScraperTool(actor=self.actor),
                 GoogleSearchTool(actor=self.actor)
             ],
-            llm=self.llm,
-            verbose=False  # Suppress agent output
+        )
+
+    @agent
+    def linkedin_researcher(self) -> Agent:
+        return self._source_researcher(
+            role="LinkedIn Company Researcher",
+            goal="Gather company information from LinkedIn. Use the tools provided to gather information.",
+            tools=[
+                ProfessionalProfilesTool(actor=self.actor),
+                LinkedInScraperTool(actor=self.actor)
+            ],
+        )
+
+    @agent
+    def crunchbase_researcher(self) -> Agent:
+        return self._source_researcher(
+            role="Crunchbase Company Researcher",
+            goal="Gather company and funding information from Crunchbase. Use the tools provided to gather information.",
+            tools=[
+                ProfessionalProfilesTool(actor=self.actor),
+                CrunchbaseScraperTool(actor=self.actor)
+            ],
+        )
+
+    @agent
+    def pitchbook_researcher(self) -> Agent:
+        return self._source_researcher(
+            role="PitchBook Company Researcher",
+            goal="Gather company and investment information from PitchBook. Use the tools provided to gather information.",
+            tools=[
+                ProfessionalProfilesTool(actor=self.actor),
+                PitchBookScraperTool(actor=self.actor)
+            ],
         )
     
     @agent
@@ -64,7 +129,7 @@ class CompanyResearchCrew:
             backstory="""You are a skilled data analyst specializing in business metrics
             and market analysis. You have a strong background in interpreting company 
             performance data and identifying market trends.""",
-            llm=self.llm,
+            llm=self._build_llm(),
             verbose=False  # Suppress agent output
         )
     
@@ -76,24 +141,61 @@ class CompanyResearchCrew:
             backstory="""You are an experienced business writer who excels at organizing
             complex information into clear, actionable reports. You have a keen eye for
             important details and can present information in a professional format.""",
-            llm=self.llm,
+            llm=self._build_llm(),
             verbose=False  # Suppress agent output
         )
 
+    # The per-source research tasks run concurrently, analyze_data waits for all of them
+
     @task
-    def research_company(self) -> Task:
+    def research_news(self) -> Task:
         return Task(
-            description="""Research the company using their domain name: {domain}. Focus on key insights about the company's:
-                1. Overview and core business
-                2. Products and services
+            description="""Research recent news about the company with the domain name: {domain}. Focus on:
+                1. Recent developments and news
+                2. Products and services launches
                 3. Market presence and performance
-                4. Key personnel and organization
-                5. Financial metrics and funding
-                6. Technology stack and digital presence
-                7. Recent developments and news
-                8. Major Competitors""",
-            expected_output="Detailed research findings covering all requested aspects",
-            agent=self.researcher()
+                4. Major Competitors mentioned""",
+            expected_output="Summary of the recent news and developments with their dates and sources",
+            agent=self.news_researcher(),
+            async_execution=True
+        )
+
+    @task
+    def research_linkedin(self) -> Task:
+        return Task(
+            description="""Find the LinkedIn company profile of the company with the domain name: {domain} and scrape it. Focus on:
+                1. Overview and core business
+                2. Key personnel and organization
+                3. Employee count, locations and specialities""",
+            expected_output="LinkedIn research findings covering all requested aspects",
+            agent=self.linkedin_researcher(),
+            async_execution=True
+        )
+
+    @task
+    def research_crunchbase(self) -> Task:
+        return Task(
+            description="""Find the Crunchbase profile of the company with the domain name: {domain} and scrape it. Focus on:
+                1. Financial metrics and funding rounds
+                2. Investors and acquisitions
+                3. Products and services
+                4. Technology stack and digital presence
+                5. Founders and similar companies""",
+            expected_output="Crunchbase research findings covering all requested aspects",
+            agent=self.crunchbase_researcher(),
+            async_execution=True
+        )
+
+    @task
+    def research_pitchbook(self) -> Task:
+        return Task(
+            description="""Find the PitchBook profile of the company with the domain name: {domain} and scrape it. Focus on:
+                1. Financing rounds and latest deal
+                2. Investors and investments
+                3. Major Competitors""",
+            expected_output="PitchBook research findings covering all requested aspects",
+            agent=self.pitchbook_researcher(),
+            async_execution=True
         )
 
     @task
@@ -109,7 +211,8 @@ class CompanyResearchCrew:
             7. a list of major competitors
             """,
             expected_output="Analysis report with key business insights",
-            agent=self.data_analyst()
+            agent=self.data_analyst(),
+            context=self._research_tasks()
         )
 
     @task
@@ -121,21 +224,37 @@ class CompanyResearchCrew:
             agent=self.content_compiler()
         )
 
+    def _research_agents(self) -> list:
+        return [
+            self.news_researcher(),
+            self.linkedin_researcher(),
+            self.crunchbase_researcher(),
+            self.pitchbook_researcher(),
+        ]
+
+    def _research_tasks(self) -> list:
+        return [
+            self.research_news(),
+            self.research_linkedin(),
+            self.research_crunchbase(),
+            self.research_pitchbook(),
+        ]
+
     @crew
     def crew(self) -> Crew:
         return Crew(
             agents=[
-                self.researcher(),
+                *self._research_agents(),
                 self.data_analyst(),
                 # self.content_compiler()
             ],
             tasks=[
-                self.research_company(),
+                *self._research_tasks(),
                 self.analyze_data(),
                 # self.compile_report()
             ],
             process=Process.sequential,
             verbose=True,  # Suppress crew output
-            max_rpm=100,  # No rate limiting
+            max_rpm=100,  # Per crew, the process-wide budgets are in tools/rate_limiter.py
             show_tools_output=False  # Suppress tools output
         ) 
\ No newline at end of file
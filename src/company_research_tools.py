@@ -1,14 +1,32 @@
 from crewai.tools import BaseTool
 from pydantic import Field, ConfigDict
-from typing import Dict, List, Optional
+from typing import Any, Coroutine, Dict, List, Optional
 from apify import Actor
 import re
 import validators
-import asyncio
-import nest_asyncio
-
-# Apply nest_asyncio to allow nested event loops
-nest_asyncio.apply()
+from src.tool_loop import run_async, run_sync
+from src.profile_discovery import discover_profiles
+from src.compaction import compact_source
+from src.tracing import payload_bytes, span, tracing_active
+from src.apify_runner import (
+    run_actor,
+    GOOGLE_SEARCH_ACTOR,
+    LINKEDIN_ACTOR,
+    CRUNCHBASE_ACTOR,
+    PITCHBOOK_ACTOR,
+)
+
+async def _traced(tool_name: str, coro: Coroutine[Any, Any, Any]) -> Any:
+    """Await a tool call inside a "tool" tracing span.
+
+    Runs on the tool loop, which the caller's context is copied to, so the
+    span belongs to the trace of the research run that called the tool.
+    """
+    with span("tool", tool_name) as trace_span:
+        result = await coro
+        if tracing_active():
+            trace_span.set(items=len(result) if isinstance(result, list) else 1, bytes=payload_bytes(result))
+        return result
 
 class CompanyNewsSearchTool(BaseTool):
     """Tool for searching recent company news articles"""
@@ -22,13 +40,12 @@ class CompanyNewsSearchTool(BaseTool):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def _run(self, domain: str) -> List[Dict]:
-        """Execute synchronously by creating a new event loop"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self._async_run(domain))
-        finally:
-            loop.close()
+        """Execute synchronously on the shared tool event loop"""
+        return run_sync(_traced(self.name, self._async_run(domain)))
+
+    async def _arun(self, domain: str) -> List[Dict]:
+        """Execute asynchronously on the shared tool event loop"""
+        return await run_async(_traced(self.name, self._async_run(domain)))
 
     async def _async_run(self, domain: str) -> List[Dict]:
         """Async implementation of the tool"""
@@ -41,16 +58,9 @@ class CompanyNewsSearchTool(BaseTool):
             "resultsPerPage": 5
         }
         
-        actor_run = await self.actor.call(actor_id="apify/google-search-scraper", run_input=run_input)
-        if actor_run is None:
-            raise RuntimeError('Actor task failed to start.')
-            
-        run_client = self.actor.apify_client.run(actor_run.id)
-        await run_client.wait_for_finish()
-        dataset_client = run_client.dataset()
-        items = await dataset_client.list_items()
-        dataset_items = items.items
-        results = dataset_items[1]['organicResults']
+        dataset_items = await run_actor(self.actor, GOOGLE_SEARCH_ACTOR, run_input, limit=2, fields=["organicResults"])
+        # A run aborted at its deadline may not have reached the second page
+        results = dataset_items[1].get('organicResults', []) if len(dataset_items) > 1 else []
         
         news_articles = []
         for item in results:
@@ -62,7 +72,7 @@ class CompanyNewsSearchTool(BaseTool):
                     "emphasized_keywords": item.get("emphasizedKeywords", []),
                     "date": item.get("date", "")
                 })
-        return news_articles[:]
+        return compact_source("recent_news", news_articles)
 
 class GoogleSearchTool(BaseTool):
     """Tool for searching recent company news articles"""
@@ -75,13 +85,12 @@ class GoogleSearchTool(BaseTool):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def _run(self, query: str) -> List[Dict]:
-        """Execute synchronously by creating a new event loop"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self._async_run(query))
-        finally:
-            loop.close()
+        """Execute synchronously on the shared tool event loop"""
+        return run_sync(_traced(self.name, self._async_run(query)))
+
+    async def _arun(self, query: str) -> List[Dict]:
+        """Execute asynchronously on the shared tool event loop"""
+        return await run_async(_traced(self.name, self._async_run(query)))
 
     async def _async_run(self, query: str) -> List[Dict]:
         """Async implementation of the tool"""
@@ -93,16 +102,11 @@ class GoogleSearchTool(BaseTool):
             "resultsPerPage": 5
         }
         
-        actor_run = await self.actor.call(actor_id="apify/google-search-scraper", run_input=run_input)
-        if actor_run is None:
-            raise RuntimeError('Actor task failed to start.')
-            
-        run_client = self.actor.apify_client.run(actor_run.id)
-        await run_client.wait_for_finish()
-        dataset_client = run_client.dataset()
-        items = await dataset_client.list_items()
-        dataset_items = items.items
-        return dataset_items
+        dataset_items = await run_actor(self.actor, GOOGLE_SEARCH_ACTOR, run_input, fields=["searchQuery", "organicResults"])
+        return [
+            {**item, "organicResults": compact_source("search_results", item.get("organicResults", []))}
+            for item in dataset_items
+        ]
         results = dataset_items[1]['organicResults']
         
         news_articles = []
@@ -129,62 +133,17 @@ class ProfessionalProfilesTool(BaseTool):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def _run(self, domain: str) -> Dict:
-        """Execute synchronously by creating a new event loop"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self._async_run(domain))
-        finally:
-            loop.close()
+        """Execute synchronously on the shared tool event loop"""
+        return run_sync(_traced(self.name, self._async_run(domain)))
+
+    async def _arun(self, domain: str) -> Dict:
+        """Execute asynchronously on the shared tool event loop"""
+        return await run_async(_traced(self.name, self._async_run(domain)))
 
     async def _async_run(self, domain: str) -> Dict:
         """Async implementation of the tool"""
         # print(f"Searching profiles for domain: {domain}")
-        search_queries = [
-            f"site:crunchbase.com company {domain}",
-            f"site:linkedin.com company {domain}",
-            f"site:pitchbook.com company {domain}"
-        ]
-        
-        run_input = {
-            "queries": "\n".join(search_queries),
-            "maxPagesPerQuery": 1,
-            "resultsPerPage": 1
-        }
-        
-        actor_run = await self.actor.call(actor_id="apify/google-search-scraper", run_input=run_input)
-        if actor_run is None:
-            raise RuntimeError('Actor task failed to start.')
-            
-        run_client = self.actor.apify_client.run(actor_run.id)
-        await run_client.wait_for_finish()
-        dataset_client = run_client.dataset()
-        items = await dataset_client.list_items()
-        dataset_items = items.items
-
-        results = [j for j in [s.get('organicResults', [])[0] for s in dataset_items]]
-
-        profiles = {
-            "linkedin": "",
-            "crunchbase": "",
-            "pitchbook": ""
-        }
-        
-        platform_patterns = {
-            "linkedin": r"linkedin\.com/company/[^/]+",
-            "crunchbase": r"crunchbase\.com/organization/[^/]+",
-            "pitchbook": r"pitchbook\.com/profiles/company/[^/]+"
-        }
-        
-        for item in results:
-            url = item.get('url', '').lower()
-            for platform, pattern in platform_patterns.items():
-                if re.search(pattern, url) and not profiles[platform]:
-                    profiles[platform] = url
-                    profiles[f'{platform}_description'] = item.get('description', '')
-                    break
-        
-        return profiles
+        return await discover_profiles(self.actor, domain)
 
 class LinkedInScraperTool(BaseTool):
     """Tool for scraping LinkedIn company profiles"""
@@ -198,13 +157,12 @@ class LinkedInScraperTool(BaseTool):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def _run(self, url: str) -> Dict:
-        """Execute synchronously by creating a new event loop"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self._async_run(url))
-        finally:
-            loop.close()
+        """Execute synchronously on the shared tool event loop"""
+        return run_sync(_traced(self.name, self._async_run(url)))
+
+    async def _arun(self, url: str) -> Dict:
+        """Execute asynchronously on the shared tool event loop"""
+        return await run_async(_traced(self.name, self._async_run(url)))
 
     async def _async_run(self, url: str) -> Dict:
         """Async implementation of the tool"""
@@ -213,17 +171,10 @@ class LinkedInScraperTool(BaseTool):
             
         run_input = {"url": url}
 
-        actor_run = await self.actor.call(actor_id="pratikdani/linkedin-company-profile-scraper", run_input=run_input)
-        if actor_run is None:
-            raise RuntimeError('Actor task failed to start.')
-            
-        run_client = self.actor.apify_client.run(actor_run.id)
-        await run_client.wait_for_finish()
-        dataset_client = run_client.dataset()
-        items = await dataset_client.list_items()
-        items = items.items
+        items = await run_actor(self.actor, LINKEDIN_ACTOR, run_input, limit=1)
 
-        return {**items[0], "result_type": "linkedin"} if items else {"result_type": "linkedin"}
+        result = {**items[0], "result_type": "linkedin"} if items else {"result_type": "linkedin"}
+        return compact_source("linkedin_data", result)
 
 class CrunchbaseScraperTool(BaseTool):
     """Tool for scraping Crunchbase organization profiles"""
@@ -237,13 +188,12 @@ class CrunchbaseScraperTool(BaseTool):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def _run(self, url: str) -> Dict:
-        """Execute synchronously by creating a new event loop"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self._async_run(url))
-        finally:
-            loop.close()
+        """Execute synchronously on the shared tool event loop"""
+        return run_sync(_traced(self.name, self._async_run(url)))
+
+    async def _arun(self, url: str) -> Dict:
+        """Execute asynchronously on the shared tool event loop"""
+        return await run_async(_traced(self.name, self._async_run(url)))
 
     async def _async_run(self, url: str) -> Dict:
         """Async implementation of the tool"""
@@ -252,17 +202,10 @@ class CrunchbaseScraperTool(BaseTool):
         
         run_input = {"url": url}
 
-        actor_run = await self.actor.call(actor_id="pratikdani/crunchbase-companies-scraper", run_input=run_input)
-        if actor_run is None:
-            raise RuntimeError('Actor task failed to start.')
-            
-        run_client = self.actor.apify_client.run(actor_run.id)
-        await run_client.wait_for_finish()
-        dataset_client = run_client.dataset()
-        items = await dataset_client.list_items()
-        items = items.items
+        items = await run_actor(self.actor, CRUNCHBASE_ACTOR, run_input, limit=1)
         
-        return {**items[0], "result_type": "crunchbase"} if items else {"result_type": "crunchbase"}
+        result = {**items[0], "result_type": "crunchbase"} if items else {"result_type": "crunchbase"}
+        return compact_source("crunchbase_data", result)
 
 class PitchBookScraperTool(BaseTool):
     """Tool for scraping PitchBook company profiles"""
@@ -276,13 +219,12 @@ class PitchBookScraperTool(BaseTool):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
     def _run(self, url: str) -> Dict:
-        """Execute synchronously by creating a new event loop"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self._async_run(url))
-        finally:
-            loop.close()
+        """Execute synchronously on the shared tool event loop"""
+        return run_sync(_traced(self.name, self._async_run(url)))
+
+    async def _arun(self, url: str) -> Dict:
+        """Execute asynchronously on the shared tool event loop"""
+        return await run_async(_traced(self.name, self._async_run(url)))
 
     async def _async_run(self, url: str) -> Dict:
         """Async implementation of the tool"""
@@ -291,14 +233,7 @@ class PitchBookScraperTool(BaseTool):
 
         run_input = {"url": url}
         
-        actor_run = await self.actor.call(actor_id="pratikdani/pitchbook-companies-scraper", run_input=run_input)
-        if actor_run is None:
-            raise RuntimeError('Actor task failed to start.')
-            
-        run_client = self.actor.apify_client.run(actor_run.id)
-        await run_client.wait_for_finish()
-        dataset_client = run_client.dataset()
-        items = await dataset_client.list_items()
-        items = items.items
+        items = await run_actor(self.actor, PITCHBOOK_ACTOR, run_input, limit=1)
         
-        return {**items[0], "result_type": "pitchbook"} if items else {"result_type": "pitchbook"} 
\ No newline at end of file
+        result = {**items[0], "result_type": "pitchbook"} if items else {"result_type": "pitchbook"}
+        return compact_source("pitchbook_data", result) 
\ No newline at end of file
@@ -21,26 +21,101 @@ Key Functions:
 - scrape_crunchbase_org: Collects funding and company data from Crunchbase
 - get_pitchbook_profile: Gathers company information from PitchBook
 - generate_company_report: Creates comprehensive report using LLM
+- generate_company_report_async: Creates the report through the async LLM client
+- generate_company_report_map_reduce: Drafts report sections concurrently and merges them
 - get_funding_timeline: Structures funding data chronologically
-- sanitize_data: Removes circular references from data structures
+- collect_company_data: Collects all sources concurrently without the agents
+- research_company_fast: Collects data and writes the report with one LLM call
+- refresh_company_data: Re-scrapes only the stale sources of a previous record
+- kickoff_crew: Runs a research crew without blocking the event loop
+- trace_crew_tasks: Adds a tracing span for every task of a finished crew run
+- save_trace: Stores the detailed trace of a research run
+- research_domains: Researches a batch of domains with bounded concurrency
+- log_token_usage: Logs and stores the token usage of the actor run
 """
 
 from apify import Actor
 import validators
 import asyncio
 import re
-from typing import Dict, List
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
 from datetime import datetime
 import json
-from tools.llm_api import create_llm_client
 from dotenv import load_dotenv
 import os
+from tools.cassette import cassette
+from tools.llm_api import llm_cache
+from tools.rate_limiter import rate_limiter
 from src.company_research_crew import CompanyResearchCrew
+from src.result_cache import result_cache
+from src.compaction import compact_record
+from src.report_sections import REPORT_SECTIONS, build_merge_prompt, build_section_prompt
+from src.token_accounting import (
+    estimate_tokens,
+    record_usage,
+    record_usage_delta,
+    run_usage,
+    track_usage,
+    usage_from_response,
+)
+from src.tracing import Trace, add_span, span, start_trace
+from src.profile_discovery import discover_profiles, discover_profiles_batch, profile_index
+from src.worker_pool import WorkerPool
+from src.apify_runner import (
+    run_actor,
+    GOOGLE_SEARCH_ACTOR,
+    LINKEDIN_ACTOR,
+    CRUNCHBASE_ACTOR,
+    PITCHBOOK_ACTOR,
+)
 import warnings
 
 warnings.filterwarnings("ignore")
 load_dotenv()
 
+# Number of domains researched at the same time in batch mode
+DEFAULT_MAX_CONCURRENCY = 5
+
+# "crew" lets the agents drive data collection, "fast" collects all sources
+# concurrently and only calls the LLM once to write the report
+RESEARCH_MODES = ("crew", "fast")
+
+# Sources of a company record, fetched independently of each other
+SOURCES = ("recent_news", "linkedin_data", "crunchbase_data", "pitchbook_data")
+
+# Maximum age in seconds before a source is scraped again in refresh mode
+SOURCE_FRESHNESS = {
+    "recent_news": 24 * 60 * 60,
+    "linkedin_data": 7 * 24 * 60 * 60,
+    "crunchbase_data": 30 * 24 * 60 * 60,
+    "pitchbook_data": 30 * 24 * 60 * 60,
+}
+
+def empty_source_payload(source: str) -> Any:
+    """Payload of a source without results, shaped like the scrapers return it."""
+    return [] if source == "recent_news" else {"result_type": source.split("_")[0]}
+
+# Awaited with (source, payload) as each source of a record arrives
+SourceCallback = Callable[[str, Any], Awaitable[None]]
+
+# Key-value store holding the latest record of every researched domain
+RECORD_STORE_NAME = 'agent-data'
+
+# Name the single report generation call is accounted under
+REPORT_AGENT = "Report Generator"
+# Name the section drafts of map-reduce report generation are accounted under
+SECTION_AGENT = "Report Section Writer"
+
+# "single" writes the report in one call, "map_reduce" drafts every section
+# concurrently from its own source slice and merges the drafts in one call
+REPORT_STRATEGIES = ("single", "map_reduce")
+
+# Minimum seconds between two writes of a streamed report to the record store
+REPORT_FLUSH_SECS = 2
+
 async def get_pitchbook_profile(Actor, url: str) -> Dict:
     """Get basic PitchBook profile info if available.
     
@@ -58,14 +133,7 @@ async def get_pitchbook_profile(Actor, url: str) -> Dict:
         "url": url,
     }
     
-    actor_run = await Actor.call(actor_id="pratikdani/pitchbook-companies-scraper", run_input=run_input)
-    if actor_run is None:
-        raise RuntimeError('Actor task failed to start.')
-    run_client = Actor.apify_client.run(actor_run.id)
-    await run_client.wait_for_finish()
-    dataset_client = run_client.dataset()
-    items = await dataset_client.list_items()
-    items = items.items
+    items = await run_actor(Actor, PITCHBOOK_ACTOR, run_input, limit=1)
     # print(items)
     return {**items[0], "result_type": "pitchbook"} if items else {"result_type": "pitchbook"}
 
@@ -118,15 +186,9 @@ async def get_company_news(Actor, domain: str) -> List[Dict]:
         "maxPagesPerQuery": 2,
         "resultsPerPage": 5
     }
-    actor_run = await Actor.call(actor_id="apify/google-search-scraper", run_input=run_input)
-    if actor_run is None:
-        raise RuntimeError('Actor task failed to start.')
-    run_client = Actor.apify_client.run(actor_run.id)
-    await run_client.wait_for_finish()
-    dataset_client = run_client.dataset()
-    items = await dataset_client.list_items()
-    dataset_items = items.items
-    results = dataset_items[1]['organicResults']
+    dataset_items = await run_actor(Actor, GOOGLE_SEARCH_ACTOR, run_input, limit=2, fields=["organicResults"])
+    # A run aborted at its deadline may not have reached the second page
+    results = dataset_items[1].get('organicResults', []) if len(dataset_items) > 1 else []
     news_articles = []
     for item in results:
         if item.get("title") and item.get("url"):
@@ -142,6 +204,9 @@ async def get_company_news(Actor, domain: str) -> List[Dict]:
 async def get_professional_profiles(Actor, domain: str) -> Dict:  # Changed to async client
     """Find professional platform profiles using targeted Google searches.
     
+    Profiles already known from past runs are taken from the profile index,
+    only the missing platforms are searched for.
+    
     Args:
         Actor: Apify Actor instance
         domain: Company domain name
@@ -153,51 +218,7 @@ async def get_professional_profiles(Actor, domain: str) -> Dict:  # Changed to a
         - pitchbook: PitchBook profile URL
         - *_description: Profile descriptions for each platform
     """
-    search_queries = [
-        f"site:crunchbase.com company {domain}",
-        f"site:linkedin.com company {domain}",
-        f"site:pitchbook.com company {domain}"
-    ]
-    
-    run_input = {
-        "queries": "\n".join(search_queries),  # Should be a list, not joined string
-        "maxPagesPerQuery": 1,
-        "resultsPerPage": 1
-    }
-    
-    actor_run = await Actor.call(actor_id="apify/google-search-scraper", run_input=run_input)
-    if actor_run is None:
-        raise RuntimeError('Actor task failed to start.')
-    run_client = Actor.apify_client.run(actor_run.id)
-    await run_client.wait_for_finish()
-    dataset_client = run_client.dataset()
-    items = await dataset_client.list_items()
-    dataset_items = items.items
-
-
-    results = [j for j in [s.get('organicResults', [])[0] for s in dataset_items]]
-
-    profiles = {
-        "linkedin": "",
-        "crunchbase": "",
-        "pitchbook": ""
-    }
-    
-    platform_patterns = {
-        "linkedin": r"linkedin\.com/company/[^/]+",
-        "crunchbase": r"crunchbase\.com/organization/[^/]+",
-        "pitchbook": r"pitchbook\.com/profiles/company/[^/]+"
-    }
-    
-    for item in results:
-        url = item.get('url', '').lower()
-        for platform, pattern in platform_patterns.items():
-            if re.search(pattern, url) and not profiles[platform]:
-                profiles[platform] = url
-                profiles[f'{platform}_description'] = item.get('description', '')
-                break
-    
-    return profiles
+    return await discover_profiles(Actor, domain)
 
 def get_funding_timeline(crunchbase_data: Dict) -> List[Dict]:
     """Structure funding data into timeline format.
@@ -240,14 +261,7 @@ async def scrape_linkedin_company(Actor, url: str) -> Dict:
         "url": url
     }
 
-    actor_run = await Actor.call(actor_id="pratikdani/linkedin-company-profile-scraper", run_input=run_input)
-    if actor_run is None:
-        raise RuntimeError('Actor task failed to start.')
-    run_client = Actor.apify_client.run(actor_run.id)
-    await run_client.wait_for_finish()
-    dataset_client = run_client.dataset()
-    items = await dataset_client.list_items()
-    items = items.items
+    items = await run_actor(Actor, LINKEDIN_ACTOR, run_input, limit=1)
 
     return {**items[0], "result_type": "linkedin"} if items else {"result_type": "linkedin"}
 
@@ -268,33 +282,29 @@ async def scrape_crunchbase_org(Actor, url: str) -> Dict:
         "url": url
     }
 
-    actor_run = await Actor.call(actor_id="pratikdani/crunchbase-companies-scraper", run_input=run_input)
-    if actor_run is None:
-        raise RuntimeError('Actor task failed to start.')
-    run_client = Actor.apify_client.run(actor_run.id)
-    await run_client.wait_for_finish()
-    dataset_client = run_client.dataset()
-    items = await dataset_client.list_items()
-    items = items.items
+    items = await run_actor(Actor, CRUNCHBASE_ACTOR, run_input, limit=1)
     
     return {**items[0], "result_type": "crunchbase"} if items else {"result_type": "crunchbase"}
 
-def generate_company_report(data: Dict) -> str:
-    """Generate a comprehensive company report using Google's LLM.
+# Model writing the report in fast mode
+REPORT_MODEL = "gemini-2.0-flash"
+
+def build_report_prompt(data: Dict, token_budget: Optional[int] = None) -> str:
+    """Build the report prompt around the compacted company data.
+    
+    The data is compacted to the fields the report relies on, with circular
+    references dropped, and serialized without whitespace so the prompt fits
+    the token budget.
     
     Args:
         data: Collected company data from all sources
+        token_budget: Maximum estimated tokens of the data in the prompt,
+            defaults to the PROMPT_TOKEN_BUDGET environment variable or 12000
         
     Returns:
-        Tuple containing:
-        - Generated markdown report
-        - Number of tokens used
+        Prompt for the report generation call
     """
-    from tools.llm_api import query_llm
-    google_gemini_api_key = os.getenv('GOOGLE_API_KEY')
-    sanitized_data = sanitize_data(data)
-
-    prompt = f"""You are a business analyst. Generate a comprehensive company report based on the following data. 
+    return f"""You are a business analyst. Generate a comprehensive company report based on the following data. 
     Focus on key insights about the company's:
     1. Overview and core business
     2. Products and services
@@ -306,60 +316,129 @@ def generate_company_report(data: Dict) -> str:
     
     Make it professional but easy to read. Use bullet points where appropriate. Give the report in a markdown format. Only give the report, no other text.
     
-    Data: {json.dumps(sanitized_data, indent=2)}
+    Data: {compact_record(data, token_budget=token_budget)}
     """
-    model = "gemini-2.0-flash"
-    client = create_llm_client(provider="gemini", google_gemini_api_key=google_gemini_api_key)
-    response = client.models.count_tokens(
-        model=model,
-        contents=prompt
-    )
-    input_tokens = response.total_tokens
-    report = query_llm(
-        prompt=prompt,
-        provider="gemini",
-        model=model,
-        google_gemini_api_key=google_gemini_api_key,
-    )
+
+def _record_report_usage(prompt: str, report: Optional[str], usage: Dict, agent: str = REPORT_AGENT) -> Dict:
+    """Record the usage of a report generation call and return it."""
+    # Exact counts come with the response, estimate locally when they are missing
+    estimated = not usage
+    if estimated:
+        usage = {"input_tokens": estimate_tokens(prompt), "output_tokens": estimate_tokens(report or "")}
+    usage = {"input_tokens": usage["input_tokens"], "output_tokens": usage["output_tokens"],
+             "estimated": estimated, "cached": usage.get("cached", False)}
+    record_usage(agent, usage["input_tokens"], usage["output_tokens"], estimated=estimated, cached=usage["cached"])
+    return usage
+
+async def _query_report_llm(prompt: str, agent: str = REPORT_AGENT,
+                            on_chunk: Optional[Callable[[str], Awaitable[None]]] = None):
+    """Run one report generation call through the async Gemini client.
     
-    response = client.models.count_tokens(
-        model=model,
-        contents=report
-    )
-    output_tokens = response.total_tokens
-    tokens_used = input_tokens + output_tokens
-    return report, tokens_used
+    The call is traced as an "llm" span and its usage is recorded under agent.
+    
+    Returns:
+        Tuple containing:
+        - Generated text, None if the call failed
+        - Number of tokens used
+    """
+    from tools.llm_api import query_llm_async
 
-def sanitize_data(obj, seen=None):
-    """Remove circular references from the data structure.
+    with span("llm", REPORT_MODEL, agent=agent, prompt_chars=len(prompt)) as trace_span:
+        response_usage = {}
+        text = await query_llm_async(
+            prompt=prompt,
+            provider="gemini",
+            model=REPORT_MODEL,
+            google_gemini_api_key=os.getenv('GOOGLE_API_KEY'),
+            on_response=lambda response: response_usage.update(usage_from_response(response) or {}),
+            on_chunk=on_chunk,
+        )
+        usage = _record_report_usage(prompt, text, response_usage, agent=agent)
+        trace_span.set(output_chars=len(text or ""), **usage)
+    return text, usage["input_tokens"] + usage["output_tokens"]
+
+def generate_company_report(data: Dict, token_budget: Optional[int] = None,
+                            on_chunk: Optional[Callable[[str], None]] = None) -> str:
+    """Generate a comprehensive company report using Google's LLM.
+    
+    The prompt is built by build_report_prompt. Token usage is read from the
+    response and recorded for the current domain and the actor run.
     
     Args:
-        obj: Input data structure to sanitize
-        seen: Set of object IDs already processed (for recursion)
+        data: Collected company data from all sources
+        token_budget: Maximum estimated tokens of the data in the prompt,
+            defaults to the PROMPT_TOKEN_BUDGET environment variable or 12000
+        on_chunk: Streams the report, called with each piece of text as it arrives
         
     Returns:
-        Sanitized data structure with circular references removed
+        Tuple containing:
+        - Generated markdown report
+        - Number of tokens used
     """
-    if seen is None:
-        seen = set()
-        
-    if isinstance(obj, dict):
-        # Create new dict with sanitized items
-        return {
-            key: sanitize_data(value, seen | {id(obj)})
-            for key, value in obj.items()
-            if id(value) not in seen
-        }
-    elif isinstance(obj, (list, tuple, set)):
-        # Create new list/tuple/set with sanitized items
-        return type(obj)(
-            sanitize_data(item, seen | {id(obj)})
-            for item in obj
-            if id(item) not in seen
+    from tools.llm_api import query_llm
+
+    prompt = build_report_prompt(data, token_budget=token_budget)
+    with span("llm", REPORT_MODEL, agent=REPORT_AGENT, prompt_chars=len(prompt)) as trace_span:
+        response_usage = {}
+        report = query_llm(
+            prompt=prompt,
+            provider="gemini",
+            model=REPORT_MODEL,
+            google_gemini_api_key=os.getenv('GOOGLE_API_KEY'),
+            on_response=lambda response: response_usage.update(usage_from_response(response) or {}),
+            on_chunk=on_chunk,
         )
-    else:
-        # Return non-container objects as-is
-        return obj
+        usage = _record_report_usage(prompt, report, response_usage)
+        trace_span.set(output_chars=len(report or ""), **usage)
+    return report, usage["input_tokens"] + usage["output_tokens"]
+
+async def generate_company_report_async(data: Dict, token_budget: Optional[int] = None,
+                                        on_chunk: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+    """Generate a company report without blocking the event loop.
+    
+    Same as generate_company_report, but the request goes through the shared
+    async Gemini client, so the reports of several domains are generated
+    concurrently.
+    
+    Args:
+        data: Collected company data from all sources
+        token_budget: Maximum estimated tokens of the data in the prompt
+        on_chunk: Streams the report, awaited with each piece of text as it arrives
+        
+    Returns:
+        Tuple containing:
+        - Generated markdown report
+        - Number of tokens used
+    """
+    return await _query_report_llm(build_report_prompt(data, token_budget=token_budget), on_chunk=on_chunk)
+
+async def generate_company_report_map_reduce(data: Dict, on_chunk: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+    """Generate a company report from section drafts written concurrently.
+    
+    Every section of REPORT_SECTIONS is drafted by its own LLM call that only
+    sees the source fields the section relies on. The drafts run at the same
+    time and one final call merges them, so each call has a small context and
+    the latency is about that of the slowest draft plus the merge.
+    
+    Args:
+        data: Collected company data from all sources
+        on_chunk: Streams the merged report, awaited with each piece of text
+        
+    Returns:
+        Tuple containing:
+        - Generated markdown report, None if no section could be drafted
+        - Number of tokens used
+    """
+    results = await asyncio.gather(*(
+        _query_report_llm(build_section_prompt(data, section), agent=SECTION_AGENT) for section in REPORT_SECTIONS
+    ))
+    drafts = {section: text for section, (text, _) in zip(REPORT_SECTIONS, results) if text}
+    tokens_used = sum(tokens for _, tokens in results)
+    if not drafts:
+        return None, tokens_used
+
+    report, merge_tokens = await _query_report_llm(build_merge_prompt(data['domain'], drafts), on_chunk=on_chunk)
+    return report, tokens_used + merge_tokens
 
 import re
 def extract_dict_from_json(json_str: str) -> Dict:
@@ -377,6 +456,587 @@ def extract_dict_from_json(json_str: str) -> Dict:
     except json.JSONDecodeError:
         raise ValueError("Invalid JSON string")
 
+def _source_fetchers(Actor, domain: str, profiles: Dict) -> Dict:
+    """Map every source of the company record to a coroutine function fetching it."""
+    return {
+        "recent_news": lambda: get_company_news(Actor, domain),
+        "linkedin_data": lambda: scrape_linkedin_company(Actor, profiles['linkedin']),
+        "crunchbase_data": lambda: scrape_crunchbase_org(Actor, profiles['crunchbase']),
+        "pitchbook_data": lambda: get_pitchbook_profile(Actor, profiles['pitchbook']),
+    }
+
+async def fetch_sources(Actor, domain: str, profiles: Dict, sources=SOURCES,
+                        on_source: Optional[SourceCallback] = None) -> Dict:
+    """Fetch the given sources concurrently.
+    
+    Args:
+        Actor: Apify Actor instance
+        domain: Validated company domain name
+        profiles: Discovered profile URLs
+        sources: Sources to fetch, see SOURCES
+        on_source: Awaited with (source, payload) as soon as each source arrives,
+            the funding timeline is reported right after the Crunchbase data
+        
+    Returns:
+        Dict mapping each fetched source to its payload. Sources that failed
+        are logged and left out, so one failed scraper does not fail the domain
+    """
+    fetchers = _source_fetchers(Actor, domain, profiles)
+
+    async def fetch(source: str):
+        try:
+            with span("stage", source):
+                payload = await fetchers[source]()
+        except Exception as e:
+            Actor.log.warning(f"Fetching {source} for {domain} failed: {type(e).__name__}: {e}")
+            return None
+        if on_source is not None:
+            await on_source(source, payload)
+            if source == "crunchbase_data":
+                await on_source("funding_timeline", get_funding_timeline(payload))
+        return payload
+
+    payloads = await asyncio.gather(*(fetch(source) for source in sources))
+    return {source: payload for source, payload in zip(sources, payloads) if payload is not None}
+
+def source_streamer(domain: str) -> SourceCallback:
+    """Create a callback pushing each source payload to the dataset as it arrives.
+    
+    Args:
+        domain: Validated company domain name
+        
+    Returns:
+        Callback for the on_source parameter of fetch_sources
+    """
+    async def push_source(source: str, payload) -> None:
+        await Actor.push_data({
+            "domain": domain,
+            "record_type": "source",
+            "source": source,
+            "data": payload,
+            "fetched_at": datetime.now().isoformat(),
+        })
+    return push_source
+
+def build_company_record(domain: str, profiles: Dict, data: Dict, source_timestamps: Dict) -> Dict:
+    """Build the sample_response.json-shaped record from source payloads.
+    
+    Args:
+        domain: Validated company domain name
+        profiles: Discovered profile URLs
+        data: Payload of every source in SOURCES
+        source_timestamps: ISO timestamp of when each source was fetched
+        
+    Returns:
+        Company record without the generated report
+    """
+    funding_timeline = get_funding_timeline(data['crunchbase_data'])
+    return {
+        "domain": domain,
+        "recent_news": data['recent_news'],
+        "data_collection_date": max(source_timestamps.values(), default=datetime.now().isoformat()),
+        "source_timestamps": source_timestamps,
+        "linkedin_url": profiles['linkedin'],
+        "pitchbook_url": profiles['pitchbook'],
+        "crunchbase_url": profiles['crunchbase'],
+        "linkedin_data": data['linkedin_data'],
+        "pitchbook_data": data['pitchbook_data'],
+        "crunchbase_data": {**data['crunchbase_data'], "funding_timeline": funding_timeline},
+        "funding_analysis": {
+            "total_raised": sum(round_info['amount'] for round_info in funding_timeline),
+            "rounds": funding_timeline,
+            "valuation": None,
+        },
+    }
+
+async def collect_company_data(Actor, domain: str, profiles: Optional[Dict] = None,
+                               on_source: Optional[SourceCallback] = None) -> Dict:
+    """Collect company data from all sources without going through the agents.
+    
+    Profile discovery runs first, then news search and the LinkedIn, Crunchbase
+    and PitchBook scrapers run concurrently, so collection takes roughly as long
+    as the slowest scraper.
+    
+    Args:
+        Actor: Apify Actor instance
+        domain: Validated company domain name
+        profiles: Already discovered profiles, discovered here when not given
+        on_source: Called as each source arrives, see fetch_sources
+        
+    Returns:
+        Dict shaped like sample_response.json, without the generated report
+    """
+    if profiles is None:
+        with span("stage", "profile_discovery"):
+            profiles = await get_professional_profiles(Actor, domain)
+    fetched = await fetch_sources(Actor, domain, profiles, on_source=on_source)
+    data = {source: fetched.get(source, empty_source_payload(source)) for source in SOURCES}
+    # Failed sources get no timestamp, so the next refresh treats them as stale
+    now = datetime.now().isoformat()
+    return build_company_record(domain, profiles, data, {source: now for source in fetched})
+
+def stale_sources(record: Dict, now: Optional[datetime] = None) -> List[str]:
+    """Return the sources of a record that are older than their freshness policy.
+    
+    Args:
+        record: Previously stored company record
+        now: Reference time, defaults to the current time
+        
+    Returns:
+        List of stale sources, sources without a timestamp count as stale
+    """
+    now = now or datetime.now()
+    legacy = 'source_timestamps' not in record
+    timestamps = record.get('source_timestamps') or {}
+    stale = []
+    for source in SOURCES:
+        # Records from before per-source timestamps only have the collection date
+        fetched_at = record.get('data_collection_date') if legacy else timestamps.get(source)
+        try:
+            age = (now - datetime.fromisoformat(fetched_at)).total_seconds()
+        except (TypeError, ValueError):
+            age = None
+        if source not in record or age is None or age >= SOURCE_FRESHNESS[source]:
+            stale.append(source)
+    return stale
+
+async def refresh_company_data(Actor, domain: str, previous: Dict, stale: List[str],
+                               on_source: Optional[SourceCallback] = None) -> Dict:
+    """Re-fetch only the stale sources of a previous record and merge them in.
+    
+    Args:
+        Actor: Apify Actor instance
+        domain: Validated company domain name
+        previous: Previously stored company record
+        stale: Sources to re-fetch, see stale_sources
+        on_source: Called as each re-fetched source arrives, see fetch_sources
+        
+    Returns:
+        Updated company record without the generated report
+    """
+    profiles = {
+        "linkedin": previous.get('linkedin_url', ''),
+        "crunchbase": previous.get('crunchbase_url', ''),
+        "pitchbook": previous.get('pitchbook_url', ''),
+    }
+    if not all(profiles.values()):
+        with span("stage", "profile_discovery"):
+            profiles = await get_professional_profiles(Actor, domain)
+
+    # Sources that fail again keep their previous payload and timestamp
+    data = {source: previous.get(source) or empty_source_payload(source) for source in SOURCES}
+    fetched = await fetch_sources(Actor, domain, profiles, stale, on_source=on_source)
+    data.update(fetched)
+
+    now = datetime.now().isoformat()
+    timestamps = dict(previous.get('source_timestamps') or {})
+    timestamps.update({source: now for source in fetched})
+    for source in SOURCES:
+        if source not in stale:
+            timestamps.setdefault(source, previous.get('data_collection_date') or now)
+    return build_company_record(domain, profiles, data, timestamps)
+
+def company_record_key(domain: str) -> str:
+    """Key of a domain's latest record in the record key-value store."""
+    return f"company-{domain}"
+
+def report_record_key(domain: str) -> str:
+    """Key of a domain's streamed markdown report in the record key-value store."""
+    return f"report-{domain}"
+
+def trace_record_key(name: str) -> str:
+    """Key of the detailed trace of a research run in the record key-value store."""
+    return f"trace-{name}"
+
+# Record store writes collected instead of written, see defer_record_writes
+deferred_records: ContextVar[Optional[Dict[str, list]]] = ContextVar("deferred_records", default=None)
+
+async def set_record(key: str, value, content_type: Optional[str] = None) -> None:
+    """Write a value to the record store, or collect it while writes are deferred."""
+    deferred = deferred_records.get()
+    if deferred is not None:
+        deferred[key] = [value, content_type]
+        return
+    store = await Actor.open_key_value_store(name=RECORD_STORE_NAME)
+    await store.set_value(key, value, content_type=content_type)
+
+@contextmanager
+def defer_record_writes() -> Iterator[Dict[str, list]]:
+    """Collect the record store writes made in the block instead of writing them.
+    
+    Worker processes research with their writes deferred, the parent process
+    writes them with write_records, so the local storage only ever has one
+    writer. A later write of a key replaces an earlier one, a streamed report
+    is only kept in its final state.
+    
+    Yields:
+        Dict mapping each written key to its value and content type
+    """
+    records: Dict[str, list] = {}
+    token = deferred_records.set(records)
+    try:
+        yield records
+    finally:
+        deferred_records.reset(token)
+
+async def write_records(records: Dict[str, list]) -> None:
+    """Write record store values collected by defer_record_writes."""
+    for key, (value, content_type) in records.items():
+        await set_record(key, value, content_type=content_type)
+
+async def save_trace(trace: Trace) -> None:
+    """Store the detailed trace of a research run, see src/tracing.py."""
+    await set_record(trace_record_key(trace.name), trace.to_dict())
+
+class ReportStreamer:
+    """Writes a report to the record key-value store while it is being generated.
+    
+    The text is written at most every flush_secs seconds as chunks arrive, so
+    a run failing late in the generation keeps everything generated so far.
+    The time to the first chunk and the total duration are measured from the
+    moment the streamer is created.
+    """
+
+    def __init__(self, domain: str, flush_secs: float = REPORT_FLUSH_SECS):
+        self.key = report_record_key(domain)
+        self.flush_secs = flush_secs
+        self.parts: List[str] = []
+        self.started_at = time.monotonic()
+        self.first_chunk_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._written_at = 0.0
+
+    @property
+    def text(self) -> str:
+        """Report text received so far."""
+        return "".join(self.parts)
+
+    async def __call__(self, chunk: str) -> None:
+        now = time.monotonic()
+        if self.first_chunk_at is None:
+            self.first_chunk_at = now
+        self.parts.append(chunk)
+        if now - self._written_at >= self.flush_secs:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the text received so far."""
+        await set_record(self.key, self.text, content_type="text/markdown")
+        self._written_at = time.monotonic()
+
+    async def finish(self) -> None:
+        """Write the final text and stop the clock."""
+        self.finished_at = time.monotonic()
+        await self.flush()
+
+    def timing(self) -> Dict:
+        """Return the time to the first chunk and the generation duration in seconds."""
+        end = self.finished_at or time.monotonic()
+        return {
+            "time_to_first_token_secs": round(self.first_chunk_at - self.started_at, 3)
+            if self.first_chunk_at is not None else None,
+            "duration_secs": round(end - self.started_at, 3),
+        }
+
+async def load_company_record(domain: str) -> Optional[Dict]:
+    """Load the latest stored record of a domain, None if there is none."""
+    store = await Actor.open_key_value_store(name=RECORD_STORE_NAME)
+    return await store.get_value(company_record_key(domain))
+
+async def save_company_record(record: Dict) -> None:
+    """Store a record as the latest record of its domain."""
+    await set_record(company_record_key(record['domain']), record)
+
+async def research_company_fast(Actor, domain: str, profiles: Optional[Dict] = None, refresh: bool = False,
+                                stream: bool = False, stream_report: bool = False,
+                                report_strategy: str = "single") -> Dict:
+    """Research a company with deterministic data collection and a single LLM call.
+    
+    With refresh enabled, the domain's previous record is loaded and only the
+    sources older than their SOURCE_FRESHNESS policy are scraped again. If
+    nothing is stale, the previous record is returned as is.
+    
+    With stream enabled, every source is pushed to the default dataset as a
+    separate record as soon as it arrives, so a late failure keeps the data
+    already scraped.
+    
+    With stream_report enabled, the report is written to the `report-<domain>`
+    record of the record store while it is generated, and the time to first
+    token is reported in `report_generation`. If generation fails midway, the
+    partial report is kept and marked incomplete.
+    
+    Args:
+        Actor: Apify Actor instance
+        domain: Validated company domain name
+        profiles: Already discovered profiles, discovered here when not given
+        refresh: Reuse fresh sources of the previous record
+        stream: Push each source to the dataset as soon as it arrives
+        stream_report: Stream the report to the record store as it is generated
+        report_strategy: "single" for one report call, "map_reduce" to draft
+            the sections concurrently and merge them
+        
+    Returns:
+        Dict shaped like sample_response.json, including the generated report
+    """
+    on_source = source_streamer(domain) if stream else None
+    previous = await load_company_record(domain) if refresh else None
+    if previous:
+        stale = stale_sources(previous)
+        complete = (previous.get('report_generation') or {}).get('complete', True)
+        if not stale and previous.get('generated_report') and complete:
+            return previous
+        data = await refresh_company_data(Actor, domain, previous, stale, on_source=on_source)
+    else:
+        data = await collect_company_data(Actor, domain, profiles=profiles, on_source=on_source)
+
+    generate = generate_company_report_map_reduce if report_strategy == "map_reduce" else generate_company_report_async
+    if not stream_report:
+        with span("stage", "report", strategy=report_strategy):
+            report, _ = await generate(data)
+        record = {**data, "generated_report": report}
+    else:
+        streamer = ReportStreamer(domain)
+        with span("stage", "report", strategy=report_strategy):
+            report, _ = await generate(data, on_chunk=streamer)
+            await streamer.finish()
+        record = {
+            **data,
+            # Keep what was generated before a failure
+            "generated_report": report or streamer.text or None,
+            "report_generation": {**streamer.timing(), "complete": report is not None},
+        }
+        Actor.log.info(f"Report for {domain} streamed: {record['report_generation']}")
+    await save_company_record(record)
+    return record
+
+async def build_research_crew(actor) -> CompanyResearchCrew:
+    """Build a research crew on a worker thread.
+    
+    Building the agents, tools and LLM clients is synchronous and can take a
+    while, so it is kept off the actor's event loop.
+    """
+    return await asyncio.to_thread(CompanyResearchCrew, actor=actor)
+
+def trace_crew_tasks(tasks, tokens_by_agent: Dict[str, Dict[str, int]]) -> None:
+    """Add a "crew_task" span for every task of a finished crew run.
+    
+    CrewAI stamps each task with its start and end time, tasks without them
+    (older CrewAI versions) are skipped.
+    
+    Args:
+        tasks: Tasks of the crew
+        tokens_by_agent: Tokens used during the run per agent role, see record_usage_delta
+    """
+    now, wall_now = time.monotonic(), datetime.now()
+    for crew_task in tasks:
+        started, ended = getattr(crew_task, "start_time", None), getattr(crew_task, "end_time", None)
+        if not started or not ended:
+            continue
+        role = crew_task.agent.role if crew_task.agent else None
+        tokens = tokens_by_agent.get(role, {})
+        output = getattr(crew_task, "output", None)
+        add_span(
+            "crew_task",
+            crew_task.name or role,
+            now - (wall_now - started).total_seconds(),
+            now - (wall_now - ended).total_seconds(),
+            agent=role,
+            input_tokens=tokens.get("input_tokens", 0),
+            output_tokens=tokens.get("output_tokens", 0),
+            output_chars=len(output.raw or "") if output is not None else 0,
+        )
+
+async def kickoff_crew(research_crew: CompanyResearchCrew, inputs: Dict):
+    """Run a crew without blocking the actor's event loop.
+    
+    The synchronous crew run happens on a worker thread, through CrewAI's
+    kickoff_async where available, so platform events and other domains keep
+    being served while the agents work. Context variables such as the token
+    accounting and the trace of the current domain follow the run onto the
+    thread. Tools do their Apify I/O on the shared tool loop.
+    
+    The tokens the agents used are recorded for the current domain and every
+    task is traced as a "crew_task" span with the tokens of its agent.
+    
+    Args:
+        research_crew: Crew instance to run
+        inputs: Crew inputs, e.g. the domain
+        
+    Returns:
+        Output of the crew run
+    """
+    crew = research_crew.crew()
+    before = research_crew.agent_token_usage()
+    with span("stage", "crew"):
+        if hasattr(crew, "kickoff_async"):
+            result = await crew.kickoff_async(inputs=inputs)
+        else:
+            result = await asyncio.to_thread(crew.kickoff, inputs=inputs)
+        trace_crew_tasks(crew.tasks, record_usage_delta(before, research_crew.agent_token_usage()))
+    return result
+
+async def research_domain(actor, research_crew: Optional[CompanyResearchCrew], domain: str, mode: str = "crew",
+                          profiles: Optional[Dict] = None, refresh: bool = False, stream: bool = False,
+                          stream_report: bool = False, report_strategy: str = "single") -> Dict:
+    """Research a single, already validated domain.
+    
+    Args:
+        actor: Apify Actor instance
+        research_crew: Crew instance to run the research with, unused in fast mode
+        domain: Validated company domain name
+        mode: "crew" to let the agents drive the research, "fast" to collect
+            data deterministically and only use the LLM for the report
+        profiles: Already discovered profiles, used in fast mode
+        refresh: Only re-scrape stale sources of the previous record, fast mode only
+        stream: Push each source to the dataset as it arrives, fast mode only
+        stream_report: Stream the report to the record store, fast mode only
+        report_strategy: How the report is generated, fast mode only, see REPORT_STRATEGIES
+        
+    Returns:
+        Dict containing the domain, the generated report, the token usage of
+        this research, in total and per agent, and a timing summary of its
+        trace. The detailed trace is stored as `trace-<domain>` in the record
+        store.
+    """
+    with track_usage() as usage, start_trace(domain) as trace:
+        if mode == "fast":
+            response = await research_company_fast(actor, domain, profiles=profiles, refresh=refresh, stream=stream,
+                                                   stream_report=stream_report, report_strategy=report_strategy)
+        else:
+            result = await kickoff_crew(research_crew, {'domain': domain})
+            response = {
+                "domain": domain,
+                "report": result,
+            }
+    await save_trace(trace)
+    return {**response, "token_usage": usage.summary(), "timings": trace.summary()}
+
+async def research_domains(actor, domains: List[str], max_concurrency: int = DEFAULT_MAX_CONCURRENCY, mode: str = "crew",
+                           refresh: bool = False, stream: bool = False, stream_report: bool = False,
+                           report_strategy: str = "single", workers: int = 1) -> None:
+    """Research many domains in one actor run with bounded concurrency.
+    
+    Profiles of all domains are discovered up front with batched Google
+    searches. Crews are built once per concurrency slot and reused for every
+    domain processed by that slot. Each domain is pushed as a separate dataset record,
+    failures included, so one bad domain does not abort the batch.
+    
+    With more than one worker, domains are researched in a pool of worker
+    processes, each with its own warm crew and clients, so CPU-bound crew work
+    uses several cores. Every worker researches one domain at a time, their
+    results, token usage, records and discovered profiles are merged and
+    written here.
+    
+    Args:
+        actor: Apify Actor instance
+        domains: Raw domain names to research
+        max_concurrency: Maximum number of domains researched at the same time
+        mode: Research mode, see research_domain
+        refresh: Only re-scrape stale sources, see research_domain
+        stream: Push sources as they arrive, see research_domain
+        stream_report: Stream reports to the record store, see research_domain
+        report_strategy: How reports are generated, see research_domain
+        workers: Number of worker processes, 1 researches in this process
+    """
+    max_concurrency = max(1, min(max_concurrency, len(domains)))
+    pool = None
+    if workers > 1:
+        if stream:
+            # Local storages are not safe for datasets written by several processes
+            Actor.log.warning("streamResults is not supported with workers, only final records are pushed")
+            stream = False
+        if stream_report:
+            Actor.log.warning("streamReport writes reports only once they are complete with workers")
+        workers = min(workers, len(domains))
+        # The API budgets are shared by the whole run, each worker gets an equal part
+        settings = {"use_cache": result_cache.enabled, "use_llm_cache": llm_cache.enabled,
+                    "rate_limits": rate_limiter.limits(share=workers)}
+        pool = WorkerPool(workers, mode, settings)
+        Actor.log.info(f"Researching in {pool.workers} worker processes")
+
+    crews = asyncio.Queue()
+    if mode == "crew" and pool is None:
+        for research_crew in await asyncio.gather(*(build_research_crew(actor) for _ in range(max_concurrency))):
+            crews.put_nowait(research_crew)
+    else:
+        for _ in range(max_concurrency):
+            crews.put_nowait(None)
+
+    dataset = await Actor.open_dataset(name='agent-data')
+
+    valid_domains = []
+    for raw_domain in domains:
+        try:
+            valid_domains.append(await validate_domain(raw_domain))
+        except ValueError:
+            pass
+    with start_trace("profile-discovery") as trace:
+        try:
+            profiles_by_domain = await discover_profiles_batch(actor, valid_domains)
+        except Exception:
+            # Every domain falls back to its own discovery
+            Actor.log.exception("Batched profile discovery failed")
+            profiles_by_domain = {}
+    Actor.log.info(f"Batched profile discovery: {trace.summary()}")
+    await save_trace(trace)
+
+    async def process(raw_domain: str) -> bool:
+        research_crew = await crews.get()
+        try:
+            domain = await validate_domain(raw_domain)
+            options = {"mode": mode, "refresh": refresh, "stream": stream, "stream_report": stream_report,
+                       "report_strategy": report_strategy}
+            if pool is not None:
+                response, records, profiles = await pool.research(domain, profiles_by_domain.get(domain), **options)
+                # Workers leave the storages to this process
+                await write_records(records)
+                profile_index.update(domain, profiles)
+                run_usage.merge(response.get("token_usage") or {})
+            else:
+                response = await research_domain(actor, research_crew, domain,
+                                                 profiles=profiles_by_domain.get(domain), **options)
+            succeeded = True
+        except Exception as e:
+            Actor.log.exception(f"Research failed for {raw_domain}")
+            response = {
+                "domain": raw_domain,
+                "error": str(e),
+            }
+            succeeded = False
+        finally:
+            crews.put_nowait(research_crew)
+
+        await dataset.push_data(response)
+        await Actor.push_data({**response, "record_type": "report"} if stream else response)
+        return succeeded
+
+    try:
+        results = await asyncio.gather(*(process(domain) for domain in domains))
+    finally:
+        if pool is not None:
+            await pool.shutdown()
+
+    await dataset.export_to(
+        key="company-report.csv",
+        format="csv",
+        include_content=True,
+        to_key_value_store_name='agent-data'
+    )
+    Actor.log.info(f"Batch research completed: {sum(results)} succeeded, {len(results) - sum(results)} failed")
+
+async def save_profile_index(actor) -> None:
+    """Persist the profile index, a failed write only costs future lookups."""
+    try:
+        await profile_index.flush(actor)
+    except Exception:
+        Actor.log.exception("Saving the profile index failed")
+
+async def log_token_usage() -> None:
+    """Log the token usage of the actor run and store it as TOKEN_USAGE."""
+    summary = run_usage.summary()
+    Actor.log.info(f"Token usage: {summary['total']}")
+    await Actor.set_value('TOKEN_USAGE', summary)
+
 async def main() -> None:
     """Main entry point for the Company Research Actor.
     
@@ -386,25 +1046,57 @@ async def main() -> None:
     3. Scrapes detailed data from LinkedIn, Crunchbase and PitchBook
     4. Generates comprehensive company report
     5. Handles errors and pushes results to output
+    
+    When a `domains` list is given, all of them are researched in this run
+    with at most `maxConcurrency` domains in flight at once.
     """
     async with Actor as actor:
         # Get input
         actor_input = await Actor.get_input() or {}
         domain = actor_input.get('domain')
+        domains = actor_input.get('domains') or []
         # print(domain)
+
+        result_cache.enabled = actor_input.get('useCache', True)
+        llm_cache.enabled = actor_input.get('useLlmCache', True)
+        if actor_input.get('profileIndexFile'):
+            loaded = await asyncio.to_thread(profile_index.load_file, actor_input['profileIndexFile'])
+            Actor.log.info(f"Loaded {loaded} domains into the profile index")
+
+        mode = actor_input.get('mode') or "crew"
+        if mode not in RESEARCH_MODES:
+            raise ValueError(f"Invalid mode: {mode}")
+        refresh = bool(actor_input.get('refresh'))
+        stream = bool(actor_input.get('streamResults'))
+        stream_report = bool(actor_input.get('streamReport'))
+        report_strategy = actor_input.get('reportStrategy') or "single"
+        if report_strategy not in REPORT_STRATEGIES:
+            raise ValueError(f"Invalid report strategy: {report_strategy}")
+
+        if domains:
+            max_concurrency = int(actor_input.get('maxConcurrency') or DEFAULT_MAX_CONCURRENCY)
+            workers = int(actor_input.get('workers') or 1)
+            await research_domains(actor, domains, max_concurrency=max_concurrency, mode=mode, refresh=refresh,
+                                    stream=stream, stream_report=stream_report, report_strategy=report_strategy,
+                                    workers=workers)
+            await save_profile_index(actor)
+            Actor.log.info(f"Scraper cache: {result_cache.stats()}")
+            Actor.log.info(f"LLM cache: {llm_cache.stats()}")
+            Actor.log.info(f"Rate limiter: {rate_limiter.stats()}")
+            if cassette.mode:
+                Actor.log.info(f"Cassette: {cassette.stats()}")
+            await log_token_usage()
+            return
         
         if not domain:
             raise ValueError("Domain name is required")
 
         domain = await validate_domain(domain)
 
-        # Initialize and run the CrewAI crew with the actor instance
-        research_crew = CompanyResearchCrew(actor=actor)
-        result = research_crew.crew().kickoff(inputs={'domain': domain})
-        response = {
-            "domain": domain,
-            "report": result,
-        }
+        # Initialize the CrewAI crew with the actor instance, fast mode does not use it
+        research_crew = await build_research_crew(actor) if mode == "crew" else None
+        response = await research_domain(actor, research_crew, domain, mode=mode, refresh=refresh, stream=stream,
+                                         stream_report=stream_report, report_strategy=report_strategy)
         dataset = await Actor.open_dataset(name='agent-data')
         await dataset.push_data(response)
         await dataset.export_to(
@@ -416,8 +1108,15 @@ async def main() -> None:
 
         # result = extract_dict_from_json(result)
         # Save the results
-        await Actor.push_data(response)
+        await Actor.push_data({**response, "record_type": "report"} if stream else response)
         
+        await save_profile_index(actor)
+
         # Log completion
+        Actor.log.info(f"Scraper cache: {result_cache.stats()}")
+        Actor.log.info(f"LLM cache: {llm_cache.stats()}")
+        Actor.log.info(f"Rate limiter: {rate_limiter.stats()}")
+        if cassette.mode:
+            Actor.log.info(f"Cassette: {cassette.stats()}")
+        await log_token_usage()
         Actor.log.info("Company research completed successfully")
-
@@ -0,0 +1,370 @@
+"""Discovery of a company's LinkedIn, Crunchbase and PitchBook profiles.
+
+Profile URLs are found with `site:` Google searches, matched against
+`PLATFORM_PATTERNS`. Because the mapping from a domain to its profiles rarely
+changes, discovered URLs are kept in a persistent `ProfileIndex`. Discovery
+checks the index first and only searches for the platforms still missing.
+
+Discovery for many domains is batched: the queries of up to
+`MAX_QUERIES_PER_RUN` searches are sent to a single Google search scraper run,
+and results are matched back to their domain and platform by the `searchQuery`
+each dataset item echoes, not by position. Batch runs get a timeout and
+deadline scaled to their number of queries. Domains whose queries a run never
+got to are discovered again one domain per run.
+
+The index keeps one record per domain in the `profile-index` key-value store,
+so runs only read and write the domains they research and concurrent runs do
+not overwrite each other's discoveries. Entries older than
+`PROFILE_INDEX_TTL_SECS` are ignored and discovered again. The index is filled
+from past runs and can be seeded from a bulk JSON, JSON Lines or CSV file with
+one row per domain (`domain`, `linkedin`, `crunchbase`, `pitchbook` and
+optional `*_description` columns).
+
+Key Functions:
+- build_profile_queries: Builds the site: queries for the given platforms
+- match_profiles: Picks profile URLs out of organic search results
+- discover_profiles_batch: Finds profiles for many domains with few search runs
+- discover_profiles: Finds profiles for a domain, using the index first
+
+Module Attributes:
+- profile_index: Process-wide ProfileIndex instance
+"""
+
+import asyncio
+import csv
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.apify_runner import ACTOR_SETTINGS, GOOGLE_SEARCH_ACTOR, get_apify_client, run_actor
+
+PLATFORMS = ("crunchbase", "linkedin", "pitchbook")
+
+PLATFORM_SITES = {
+    "crunchbase": "crunchbase.com",
+    "linkedin": "linkedin.com",
+    "pitchbook": "pitchbook.com",
+}
+
+PLATFORM_PATTERNS = {
+    "linkedin": r"linkedin\.com/company/[^/]+",
+    "crunchbase": r"crunchbase\.com/organization/[^/]+",
+    "pitchbook": r"pitchbook\.com/profiles/company/[^/]+"
+}
+
+# About 200 domains per Google search scraper run when all platforms are missing
+MAX_QUERIES_PER_RUN = 600
+# Extra run time granted per query on top of the scraper's default timeout
+SECS_PER_QUERY = 2
+
+INDEX_STORE_NAME = "profile-index"
+# Profiles rarely move, entries are verified again after 30 days
+PROFILE_INDEX_TTL_SECS = 30 * 24 * 60 * 60
+# Index records read or written at the same time
+INDEX_IO_CONCURRENCY = 20
+
+def build_profile_queries(domain: str, platforms: Iterable[str] = PLATFORMS) -> List[str]:
+    """Build one site: search query per platform.
+
+    Args:
+        domain: Company domain name
+        platforms: Platforms to search for
+
+    Returns:
+        List of Google search queries
+    """
+    return [f"site:{PLATFORM_SITES[platform]} company {domain}" for platform in platforms]
+
+def match_profiles(results: Iterable[Dict], platforms: Iterable[str] = PLATFORMS) -> Dict:
+    """Match organic search results to platform profile URLs.
+
+    Args:
+        results: Organic search results with `url` and `description`
+        platforms: Platforms to look for
+
+    Returns:
+        Dict with the profile URL and description of every matched platform
+    """
+    platforms = list(platforms)
+    profiles = {}
+    for item in results:
+        url = item.get('url', '').lower()
+        for platform in platforms:
+            if re.search(PLATFORM_PATTERNS[platform], url) and not profiles.get(platform):
+                profiles[platform] = url
+                profiles[f'{platform}_description'] = item.get('description', '')
+                break
+    return profiles
+
+class ProfileIndex:
+    """Persistent mapping from a domain to its profile URLs and descriptions.
+
+    Every domain is a record of its own, keyed by the domain, holding its
+    profiles and when they were stored.
+    """
+
+    def __init__(self, store_name: str = INDEX_STORE_NAME, ttl_secs: float = PROFILE_INDEX_TTL_SECS):
+        self.store_name = store_name
+        self.ttl_secs = ttl_secs
+        # domain -> {"stored_at": ..., "profiles": {...}}
+        self._entries: Dict[str, Dict] = {}
+        self._looked_up: Set[str] = set()
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+
+    async def _store_client(self, actor):
+        client = get_apify_client(actor)
+        store = await client.key_value_stores().get_or_create(name=self.store_name)
+        return client.key_value_store(store.id)
+
+    async def load(self, actor, domains: Iterable[str]) -> None:
+        """Load the persisted entries of domains not looked up yet.
+
+        Stored profiles are merged under in-memory ones, expired entries are
+        skipped.
+
+        Args:
+            actor: Apify Actor instance
+            domains: Company domain names
+        """
+        with self._lock:
+            missing = [domain for domain in dict.fromkeys(domains) if domain not in self._looked_up]
+            self._looked_up.update(missing)
+        if not missing:
+            return
+        try:
+            store = await self._store_client(actor)
+        except Exception:
+            return
+        semaphore = asyncio.Semaphore(INDEX_IO_CONCURRENCY)
+
+        async def get_record(domain: str) -> Optional[Dict]:
+            async with semaphore:
+                try:
+                    return await store.get_record(domain)
+                except Exception:
+                    return None
+
+        records = await asyncio.gather(*(get_record(domain) for domain in missing))
+        now = time.time()
+        with self._lock:
+            for domain, record in zip(missing, records):
+                value = record.get("value") if record else None
+                if not value or now - value.get("stored_at", 0) >= self.ttl_secs:
+                    continue
+                entry = self._entries.get(domain)
+                if entry is None:
+                    self._entries[domain] = value
+                else:
+                    entry["profiles"] = {**value["profiles"], **entry["profiles"]}
+
+    async def flush(self, actor) -> None:
+        """Persist the entries changed since they were loaded.
+
+        Raises:
+            Exception: The first failed write, the entries not written stay
+                pending for the next flush
+        """
+        with self._lock:
+            entries = {domain: dict(self._entries[domain]) for domain in self._dirty}
+            self._dirty.clear()
+        if not entries:
+            return
+        semaphore = asyncio.Semaphore(INDEX_IO_CONCURRENCY)
+
+        async def set_record(store, domain: str, entry: Dict) -> None:
+            async with semaphore:
+                await store.set_record(domain, entry)
+
+        try:
+            store = await self._store_client(actor)
+            results = await asyncio.gather(
+                *(set_record(store, domain, entry) for domain, entry in entries.items()),
+                return_exceptions=True,
+            )
+        except Exception as e:
+            results = [e] * len(entries)
+        failed = {domain: result for domain, result in zip(entries, results) if isinstance(result, Exception)}
+        if failed:
+            with self._lock:
+                self._dirty.update(failed)
+            raise next(iter(failed.values()))
+
+    def get(self, domain: str) -> Dict:
+        """Return the known profiles for a domain, empty if none are known."""
+        with self._lock:
+            entry = self._entries.get(domain)
+            return dict(entry["profiles"]) if entry else {}
+
+    def update(self, domain: str, profiles: Dict) -> None:
+        """Merge newly discovered, non-empty profile fields for a domain."""
+        found = {key: value for key, value in profiles.items() if value}
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is None:
+                if not found:
+                    return
+                entry = self._entries[domain] = {"stored_at": 0, "profiles": {}}
+            if any(entry["profiles"].get(key) != value for key, value in found.items()):
+                entry["profiles"].update(found)
+                entry["stored_at"] = time.time()
+                self._dirty.add(domain)
+
+    def load_bulk(self, records: Iterable[Dict]) -> int:
+        """Seed the index from records with a `domain` key and profile fields.
+
+        Args:
+            records: Rows with `domain`, platform URLs and optional descriptions
+
+        Returns:
+            Number of records loaded
+        """
+        count = 0
+        for record in records:
+            domain = (record.get('domain') or '').strip().lower()
+            if not domain:
+                continue
+            fields = {}
+            for platform in PLATFORMS:
+                if record.get(platform):
+                    fields[platform] = record[platform].strip().lower()
+                    fields[f'{platform}_description'] = record.get(f'{platform}_description') or ''
+            self.update(domain, fields)
+            count += 1
+        return count
+
+    def load_file(self, path: str) -> int:
+        """Seed the index from a JSON, JSON Lines or CSV file.
+
+        Args:
+            path: Path to the bulk file
+
+        Returns:
+            Number of records loaded
+        """
+        path = Path(path)
+        with path.open(encoding='utf-8') as f:
+            if path.suffix == '.csv':
+                return self.load_bulk(csv.DictReader(f))
+            if path.suffix == '.jsonl':
+                return self.load_bulk(json.loads(line) for line in f if line.strip())
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [{"domain": domain, **fields} for domain, fields in data.items()]
+        return self.load_bulk(data)
+
+profile_index = ProfileIndex()
+
+async def _search_profiles(actor, queries: Dict[str, tuple]) -> Tuple[Dict[str, Dict], Set[str]]:
+    """Run one Google search scraper run for a chunk of profile queries.
+
+    Args:
+        actor: Apify Actor instance
+        queries: Maps each query to the (domain, platform) it searches for
+
+    Returns:
+        Tuple of a dict mapping each domain to the profiles found for it and
+        the domains with queries the run never got to, e.g. when it was
+        aborted at its deadline
+    """
+    run_input = {
+        "queries": "\n".join(queries),
+        "maxPagesPerQuery": 1,
+        "resultsPerPage": 1
+    }
+    settings = ACTOR_SETTINGS[GOOGLE_SEARCH_ACTOR]
+    dataset_items = await run_actor(
+        actor,
+        GOOGLE_SEARCH_ACTOR,
+        run_input,
+        fields=["searchQuery", "organicResults"],
+        timeout_secs=settings["timeout_secs"] + SECS_PER_QUERY * len(queries),
+        deadline_secs=settings["deadline_secs"] + SECS_PER_QUERY * len(queries),
+    )
+
+    found: Dict[str, Dict] = {}
+    searched = set()
+    for item in dataset_items:
+        term = (item.get('searchQuery') or {}).get('term', '').strip().lower()
+        if term not in queries:
+            continue
+        searched.add(term)
+        if not item.get('organicResults'):
+            continue
+        domain, platform = queries[term]
+        found.setdefault(domain, {}).update(match_profiles(item['organicResults'][:1], [platform]))
+    unsearched = {domain for term, (domain, _) in queries.items() if term not in searched}
+    return found, unsearched
+
+async def discover_profiles_batch(actor, domains: Iterable[str], index: Optional[ProfileIndex] = None,
+                                  max_queries_per_run: int = MAX_QUERIES_PER_RUN) -> Dict[str, Dict]:
+    """Find LinkedIn, Crunchbase and PitchBook profiles for many domains.
+
+    Domains are looked up in the index first. The queries for all missing
+    platforms are packed into as few Google search scraper runs as possible,
+    which run concurrently.
+
+    Args:
+        actor: Apify Actor instance
+        domains: Company domain names
+        index: Profile index to consult and update, defaults to profile_index
+        max_queries_per_run: Maximum number of queries sent to one scraper run
+
+    Returns:
+        Dict mapping each domain to its profiles, shaped like discover_profiles
+    """
+    index = profile_index if index is None else index
+    domains = list(dict.fromkeys(domains))
+    await index.load(actor, domains)
+
+    results = {}
+    queries: Dict[str, tuple] = {}
+    for domain in domains:
+        results[domain] = {"linkedin": "", "crunchbase": "", "pitchbook": "", **index.get(domain)}
+        for platform in PLATFORMS:
+            if not results[domain][platform]:
+                query = build_profile_queries(domain, [platform])[0]
+                queries[query.lower()] = (domain, platform)
+
+    if not queries:
+        return results
+
+    chunks = [
+        dict(list(queries.items())[start:start + max_queries_per_run])
+        for start in range(0, len(queries), max_queries_per_run)
+    ]
+    unsearched: Set[str] = set()
+    for found, missed in await asyncio.gather(*(_search_profiles(actor, chunk) for chunk in chunks)):
+        for domain, profiles in found.items():
+            index.update(domain, profiles)
+            results[domain].update(profiles)
+        unsearched |= missed
+
+    # Domains cut from a partial batch run are discovered again in a run of
+    # their own, once; a single-domain run has nothing left to split
+    if unsearched and max_queries_per_run > len(PLATFORMS):
+        retried = await discover_profiles_batch(actor, sorted(unsearched), index=index,
+                                                max_queries_per_run=len(PLATFORMS))
+        results.update(retried)
+    return results
+
+async def discover_profiles(actor, domain: str, index: Optional[ProfileIndex] = None) -> Dict:
+    """Find a company's LinkedIn, Crunchbase and PitchBook profiles.
+
+    Args:
+        actor: Apify Actor instance
+        domain: Company domain name
+        index: Profile index to consult and update, defaults to profile_index
+
+    Returns:
+        Dict containing:
+        - linkedin: LinkedIn company profile URL
+        - crunchbase: Crunchbase profile URL
+        - pitchbook: PitchBook profile URL
+        - *_description: Profile descriptions for each platform
+    """
+    profiles = await discover_profiles_batch(actor, [domain], index=index)
+    return profiles[domain]
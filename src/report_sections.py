@@ -0,0 +1,120 @@
+"""Report sections and the source slices each of them is written from.
+
+In map-reduce report generation every section of the report is drafted by its
+own LLM call, which only sees the fields of the sources that section relies on
+(funding from Crunchbase and PitchBook, people from LinkedIn, news from
+`recent_news`, ...). The drafts run concurrently and are merged into the final
+report by one short call.
+
+Key Functions:
+- section_data: Slices a company record down to the fields of one section
+- build_section_prompt: Builds the prompt drafting one section
+- build_merge_prompt: Builds the prompt merging the section drafts
+"""
+
+from typing import Dict, Optional, Tuple
+
+from src.compaction import compact_record
+
+# Fields of each source a section is written from, per report section
+REPORT_SECTIONS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "Overview and core business": {
+        "linkedin_data": ("company_name", "description", "industry", "specialities", "company_type",
+                          "founded_year", "hq_address", "website"),
+        "crunchbase_data": ("name", "legal_name", "about", "full_description", "founded_date",
+                            "operating_status", "company_type", "industries"),
+        "pitchbook_data": ("company_name", "description", "year_founded", "status"),
+    },
+    "Products and services": {
+        "linkedin_data": ("description", "specialities"),
+        "crunchbase_data": ("about", "industries", "products_and_services"),
+    },
+    "Market presence and performance": {
+        "linkedin_data": ("followers", "stock_info"),
+        "crunchbase_data": ("ipo_status", "stock_symbol", "monthly_visits", "monthly_visits_growth",
+                            "similar_companies"),
+        "pitchbook_data": ("competitors",),
+    },
+    "Key personnel and organization": {
+        "linkedin_data": ("employees", "headcount", "location"),
+        "crunchbase_data": ("founders", "current_employees", "num_employees"),
+        "pitchbook_data": ("employees",),
+    },
+    "Financial metrics and funding": {
+        "crunchbase_data": ("financials_highlights", "funding_rounds", "funding_timeline", "investors",
+                            "num_investors", "acquisitions", "num_acquisitions"),
+        "pitchbook_data": ("latest_deal_type", "financing_rounds", "investors", "investments"),
+        "funding_analysis": (),
+    },
+    "Technology stack and digital presence": {
+        "linkedin_data": ("website",),
+        "crunchbase_data": ("builtwith_tech", "monthly_visits", "social_media_links", "website"),
+        "pitchbook_data": ("company_socials",),
+    },
+    "Recent developments and news": {
+        "recent_news": (),
+    },
+}
+
+# Maximum estimated tokens of the data in a section prompt
+SECTION_TOKEN_BUDGET = 4000
+
+def section_data(record: Dict, section: str) -> Dict:
+    """Slice a company record down to the fields one section is written from.
+
+    Args:
+        record: Company record shaped like sample_response.json
+        section: Section title, a key of REPORT_SECTIONS
+
+    Returns:
+        Record with the domain and only the section's sources and fields,
+        sources listed without fields are kept whole
+    """
+    sliced = {"domain": record.get("domain")}
+    for source, fields in REPORT_SECTIONS[section].items():
+        payload = record.get(source)
+        if payload is None:
+            continue
+        if fields and isinstance(payload, dict):
+            payload = {key: payload[key] for key in fields if key in payload}
+        sliced[source] = payload
+    return sliced
+
+def build_section_prompt(record: Dict, section: str, token_budget: Optional[int] = None) -> str:
+    """Build the prompt drafting one report section from its source slice.
+
+    Args:
+        record: Company record shaped like sample_response.json
+        section: Section title, a key of REPORT_SECTIONS
+        token_budget: Maximum estimated tokens of the data, defaults to SECTION_TOKEN_BUDGET
+
+    Returns:
+        Prompt for the section draft
+    """
+    token_budget = SECTION_TOKEN_BUDGET if token_budget is None else token_budget
+    return f"""You are a business analyst. Write the "{section}" section of a company report based on the following data.
+    Be concise and factual, use bullet points where appropriate. Give the section in markdown format starting with
+    a "## {section}" heading. If the data holds nothing relevant, say so in one sentence. Only give the section, no other text.
+
+    Data: {compact_record(section_data(record, section), token_budget=token_budget)}
+    """
+
+def build_merge_prompt(domain: str, drafts: Dict[str, str]) -> str:
+    """Build the prompt merging section drafts into the final report.
+
+    Args:
+        domain: Company domain name
+        drafts: Maps each section title to its markdown draft, in report order
+
+    Returns:
+        Prompt for the final report
+    """
+    sections = "\n\n".join(drafts.values())
+    return f"""You are a business analyst. Merge the following report sections about {domain} into one comprehensive
+    company report. Start with a short executive summary, keep the sections in the given order, remove repetition
+    between them and keep every fact. Make it professional but easy to read. Give the report in a markdown format.
+    Only give the report, no other text.
+
+    Sections:
+    {sections}
+    """
@@ -0,0 +1,149 @@
+"""TTL cache for scraper results keyed by actor id and run input.
+
+LinkedIn, Crunchbase and PitchBook profiles change slowly, so re-running a
+scraper for the same input within a few days wastes a paid Apify run. Results
+are kept in a size-bounded in-memory LRU and persisted to a named key-value
+store, so they survive across actor runs. The TTL of each source is configured
+with `cache_ttl_secs` in `ACTOR_SETTINGS` of `src/apify_runner.py`.
+
+Key Classes:
+- ResultCache: Two-level (memory + key-value store) cache with per-source TTLs
+
+Module Attributes:
+- result_cache: Process-wide cache instance used by run_actor
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+CACHE_STORE_NAME = "scraper-cache"
+DEFAULT_MAX_ENTRIES = 1000
+
+def make_cache_key(actor_id: str, run_input: Dict, **options) -> str:
+    """Build a stable cache key from an actor id, its input and fetch options.
+
+    Args:
+        actor_id: ID of the actor
+        run_input: Input for the actor run
+        **options: Dataset fetch options that change the result (limit, fields, ...)
+
+    Returns:
+        Hex digest usable as a key-value store key
+    """
+    normalized = json.dumps(
+        {"actor_id": actor_id, "run_input": run_input, "options": options},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """Size-bounded TTL cache for scraper results.
+
+    Lookups check the in-memory LRU first and fall back to the key-value store.
+    Entries older than their source's TTL are treated as misses.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, store_name: str = CACHE_STORE_NAME):
+        self.max_entries = max_entries
+        self.store_name = store_name
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store_ids: Dict[int, str] = {}
+
+    def _remember(self, key: str, stored_at: float, items: List[Dict]) -> None:
+        with self._lock:
+            self._entries[key] = (stored_at, items)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    async def _store_client(self, client):
+        # Resolve the named store once per client
+        store_id = self._store_ids.get(id(client))
+        if store_id is None:
+            store = await client.key_value_stores().get_or_create(name=self.store_name)
+            store_id = self._store_ids[id(client)] = store.id
+        return client.key_value_store(store_id)
+
+    async def get(self, client, key: str, ttl: Optional[int]) -> Optional[List[Dict]]:
+        """Return cached items for a key, or None on a miss.
+
+        Args:
+            client: Pooled Apify client used to reach the key-value store
+            key: Cache key from make_cache_key
+            ttl: Maximum age of a usable entry in seconds, falsy disables the lookup
+
+        Returns:
+            Cached dataset items or None
+        """
+        if not self.enabled or not ttl:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        try:
+            record = await (await self._store_client(client)).get_record(key)
+        except Exception:
+            record = None
+        value = record.get("value") if record else None
+        if value and now - value.get("stored_at", 0) < ttl:
+            self._remember(key, value["stored_at"], value["items"])
+            with self._lock:
+                self.hits += 1
+            return value["items"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def set(self, client, key: str, ttl: Optional[int], items: List[Dict]) -> None:
+        """Store items for a key in memory and in the key-value store.
+
+        Args:
+            client: Pooled Apify client used to reach the key-value store
+            key: Cache key from make_cache_key
+            ttl: TTL of the source, falsy means the source is not cached
+            items: Dataset items to cache
+        """
+        if not self.enabled or not ttl:
+            return
+
+        stored_at = time.time()
+        self._remember(key, stored_at, items)
+        try:
+            store_client = await self._store_client(client)
+            await store_client.set_record(key, {"stored_at": stored_at, "items": items})
+        except Exception:
+            # A failed write only costs a future cache hit
+            pass
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and the current number of entries."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
+
+result_cache = ResultCache()
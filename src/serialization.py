@@ -0,0 +1,156 @@
+"""Single-pass, cycle-safe JSON serialization of scraped data.
+
+Scraper payloads are plain JSON-like trees, but nothing guarantees they are
+free of reference cycles. Instead of copying the whole structure to strip
+cycles before serializing it, `dumps_safe` writes JSON directly:
+
+- Acyclic data, the normal case, is encoded by the C-accelerated `json`
+  encoder in one pass without any copy
+- If a cycle is detected, one pass marks the containers a cycle can be
+  reached from. Only those are encoded by a streaming encoder, which drops
+  the entries pointing back to an ancestor; every acyclic subtree below them
+  is still handed to the C encoder in one piece
+
+Key Functions:
+- find_cyclic_containers: Finds the containers a reference cycle is reachable from
+- iter_json_chunks: Streams JSON text chunks for a value, dropping cycles
+- dump_safe: Writes cycle-safe JSON to a file object
+- dumps_safe: Returns cycle-safe JSON as a string
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterator, Optional, Set, TextIO, Tuple
+
+CONTAINERS = (dict, list, tuple, set)
+
+def _children(value) -> Iterator[Any]:
+    return iter(value.values()) if isinstance(value, dict) else iter(value)
+
+def find_cyclic_containers(obj: Any) -> Set[int]:
+    """Return the ids of the containers from which a reference cycle is reachable.
+
+    Every container is visited once, shared containers are not walked again.
+
+    Args:
+        obj: Value to inspect
+
+    Returns:
+        Set of container ids, empty if the value is acyclic
+    """
+    cyclic: Set[int] = set()
+    visited: Dict[int, bool] = {}
+    on_path: Set[int] = set()
+
+    def visit(value: Any) -> bool:
+        key = id(value)
+        on_path.add(key)
+        reaches_cycle = False
+        for item in _children(value):
+            if not isinstance(item, CONTAINERS):
+                continue
+            item_key = id(item)
+            if item_key in on_path:
+                reaches_cycle = True
+            elif item_key in visited:
+                reaches_cycle = reaches_cycle or visited[item_key]
+            elif visit(item):
+                reaches_cycle = True
+        on_path.discard(key)
+        visited[key] = reaches_cycle
+        if reaches_cycle:
+            cyclic.add(key)
+        return reaches_cycle
+
+    if isinstance(obj, CONTAINERS):
+        visit(obj)
+    return cyclic
+
+def iter_json_chunks(obj: Any, separators: Tuple[str, str] = (",", ":"), ensure_ascii: bool = False,
+                     default: Callable[[Any], Any] = str) -> Iterator[str]:
+    """Stream the JSON encoding of a value, dropping entries that form a cycle.
+
+    An entry is dropped when its value is one of the containers currently
+    being encoded, i.e. one of its ancestors. Containers no cycle can be
+    reached from are encoded in one call to the C encoder, so the work stays
+    linear in the size of the data.
+
+    Args:
+        obj: Value to encode
+        separators: Item and key separators, as for json.dumps
+        ensure_ascii: Escape non-ASCII characters
+        default: Converts values json cannot encode
+
+    Yields:
+        Chunks of JSON text
+    """
+    item_separator, key_separator = separators
+    encode_plain = json.JSONEncoder(separators=separators, ensure_ascii=ensure_ascii, default=default).encode
+    cyclic = find_cyclic_containers(obj)
+    on_path = set()
+
+    def encode(value: Any) -> Iterator[str]:
+        if not isinstance(value, CONTAINERS) or id(value) not in cyclic:
+            yield encode_plain(value)
+            return
+
+        on_path.add(id(value))
+        first = True
+        if isinstance(value, dict):
+            yield "{"
+            for key, item in value.items():
+                if isinstance(item, CONTAINERS) and id(item) in on_path:
+                    continue
+                if not first:
+                    yield item_separator
+                first = False
+                yield encode_plain(key if isinstance(key, str) else str(key))
+                yield key_separator
+                yield from encode(item)
+            yield "}"
+        else:
+            yield "["
+            for item in value:
+                if isinstance(item, CONTAINERS) and id(item) in on_path:
+                    continue
+                if not first:
+                    yield item_separator
+                first = False
+                yield from encode(item)
+            yield "]"
+        on_path.discard(id(value))
+
+    return encode(obj)
+
+def dumps_safe(obj: Any, separators: Tuple[str, str] = (",", ":"), ensure_ascii: bool = False,
+               default: Optional[Callable[[Any], Any]] = str) -> str:
+    """Serialize a value to JSON, dropping entries that would form a cycle.
+
+    Args:
+        obj: Value to encode
+        separators: Item and key separators, as for json.dumps
+        ensure_ascii: Escape non-ASCII characters
+        default: Converts values json cannot encode
+
+    Returns:
+        JSON text
+    """
+    try:
+        return json.dumps(obj, separators=separators, ensure_ascii=ensure_ascii, default=default)
+    except ValueError as e:
+        if "Circular reference" not in str(e):
+            raise
+    return "".join(iter_json_chunks(obj, separators=separators, ensure_ascii=ensure_ascii, default=default))
+
+def dump_safe(obj: Any, fp: TextIO, separators: Tuple[str, str] = (",", ":"), ensure_ascii: bool = False,
+              default: Optional[Callable[[Any], Any]] = str) -> None:
+    """Write the cycle-safe JSON encoding of a value to a file object.
+
+    Args:
+        obj: Value to encode
+        fp: Writable text file object
+        separators: Item and key separators, as for json.dumps
+        ensure_ascii: Escape non-ASCII characters
+        default: Converts values json cannot encode
+    """
+    for chunk in iter_json_chunks(obj, separators=separators, ensure_ascii=ensure_ascii, default=default):
+        fp.write(chunk)
@@ -0,0 +1,99 @@
+"""Single-flight coalescing of identical concurrent calls.
+
+Agents often repeat a tool call with the same argument, and in batch runs two
+domains can resolve to the same company profile. Calls sharing a key are
+executed once: the first caller runs the work and every other caller, on any
+event loop or thread, awaits the same result. A finished result is served for
+a short linger window so immediate repeats do not start a new run either,
+unless the call was forgotten, e.g. because its result is incomplete.
+
+Key Classes:
+- SingleFlight: Coalesces calls by key
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its result."""
+
+    def __init__(self, linger_secs: float = 0):
+        self.linger_secs = linger_secs
+        self.coalesced = 0
+        # key -> (future, finished_at or None while in flight)
+        self._calls: Dict[str, Tuple[concurrent.futures.Future, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        expired = [
+            key for key, (_, finished_at) in self._calls.items()
+            if finished_at is not None and now - finished_at >= self.linger_secs
+        ]
+        for key in expired:
+            del self._calls[key]
+
+    def forget(self, key: str) -> None:
+        """Stop sharing the call of a key.
+
+        Callers already waiting for it still get its result, later callers
+        start a new call. Called by fn for results not worth sharing.
+        """
+        with self._lock:
+            self._calls.pop(key, None)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the call
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            Result of fn, shared by every caller with the same key
+        """
+        with self._lock:
+            self._prune(time.monotonic())
+            call = self._calls.get(key)
+            if call is not None and call[0].done() and (call[0].cancelled() or call[0].exception() is not None):
+                # Never hand out a failed call, even if it was left behind
+                del self._calls[key]
+                call = None
+            if call is not None:
+                self.coalesced += 1
+                future = call[0]
+                leader = False
+            else:
+                future = concurrent.futures.Future()
+                self._calls[key] = (future, None)
+                leader = True
+
+        if not leader:
+            # A cancelled caller must not cancel the call shared with the others
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            # Failures are not shared beyond the callers already waiting
+            with self._lock:
+                if self._calls.get(key, (None,))[0] is future:
+                    del self._calls[key]
+            if not future.done():
+                future.set_exception(e)
+            raise
+
+        with self._lock:
+            # A forgotten call may already have been replaced by a new one
+            if self._calls.get(key, (None,))[0] is future:
+                if self.linger_secs and not future.done():
+                    self._calls[key] = (future, time.monotonic())
+                else:
+                    del self._calls[key]
+        if not future.done():
+            future.set_result(result)
+        return result
@@ -0,0 +1,162 @@
+"""Token accounting for LLM calls made while researching a company.
+
+Token counts are taken from the usage metadata providers return with every
+generation, so no extra `count_tokens` round trips are needed. When a response
+carries no usage metadata, a fast local estimate is recorded instead.
+
+Usage is aggregated per agent, both for the research run of the current domain
+(tracked through a context variable, so it follows `asyncio.to_thread` and
+tasks) and for the whole actor run.
+
+Key Classes:
+- TokenUsage: Thread-safe per-agent token totals
+
+Key Functions:
+- estimate_tokens: Rough local token count of a text
+- usage_from_response: Extracts token counts from a provider response
+- record_usage: Records tokens for the current domain and the actor run
+- record_usage_delta: Records the growth between two per-agent usage snapshots
+- track_usage: Context manager collecting usage for one domain
+"""
+
+import contextlib
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text, about four characters per token."""
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def usage_from_response(response: Any) -> Optional[Dict[str, int]]:
+    """Extract input and output token counts from a provider response.
+
+    Supports Gemini (`usage_metadata`), OpenAI-compatible and Anthropic
+    (`usage`) responses. Responses served from the LLM response cache spent
+    no tokens.
+
+    Args:
+        response: Response object returned by the provider SDK
+
+    Returns:
+        Dict with input_tokens and output_tokens, plus cached for cache hits,
+        or None if not available
+    """
+    if getattr(response, "cached", False):
+        return {"input_tokens": 0, "output_tokens": 0, "cached": True}
+
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is not None and getattr(metadata, "prompt_token_count", None) is not None:
+        return {
+            "input_tokens": metadata.prompt_token_count or 0,
+            "output_tokens": getattr(metadata, "candidates_token_count", 0) or 0,
+        }
+
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        input_tokens = getattr(usage, "prompt_tokens", None)
+        if input_tokens is None:
+            input_tokens = getattr(usage, "input_tokens", None)
+        output_tokens = getattr(usage, "completion_tokens", None)
+        if output_tokens is None:
+            output_tokens = getattr(usage, "output_tokens", None)
+        if input_tokens is not None:
+            return {"input_tokens": input_tokens, "output_tokens": output_tokens or 0}
+    return None
+
+class TokenUsage:
+    """Per-agent input/output token totals."""
+
+    def __init__(self):
+        self._by_agent: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, input_tokens: int, output_tokens: int, requests: int = 1,
+               estimated: bool = False, cached: bool = False) -> None:
+        """Add the tokens of one or more LLM requests made by an agent.
+
+        Args:
+            agent: Name of the agent or component making the requests
+            input_tokens: Prompt tokens
+            output_tokens: Generated tokens
+            requests: Number of requests the tokens belong to
+            estimated: The counts are local estimates, not provider counts
+            cached: The requests were served from the LLM response cache
+        """
+        with self._lock:
+            totals = self._by_agent.setdefault(
+                agent, {"input_tokens": 0, "output_tokens": 0, "requests": 0, "estimated_requests": 0, "cached_requests": 0}
+            )
+            totals["input_tokens"] += input_tokens
+            totals["output_tokens"] += output_tokens
+            totals["requests"] += requests
+            if estimated:
+                totals["estimated_requests"] += requests
+            if cached:
+                totals["cached_requests"] += requests
+
+    def merge(self, summary: Dict) -> None:
+        """Add the per-agent totals of a summary, e.g. one made in another process."""
+        with self._lock:
+            for agent, totals in summary.get("by_agent", {}).items():
+                merged = self._by_agent.setdefault(
+                    agent, {"input_tokens": 0, "output_tokens": 0, "requests": 0, "estimated_requests": 0, "cached_requests": 0}
+                )
+                for key in merged:
+                    merged[key] += totals.get(key, 0)
+
+    def summary(self) -> Dict:
+        """Return totals over all agents and the totals of each agent."""
+        with self._lock:
+            by_agent = {agent: dict(totals) for agent, totals in self._by_agent.items()}
+        total = {"input_tokens": 0, "output_tokens": 0, "requests": 0, "estimated_requests": 0, "cached_requests": 0}
+        for totals in by_agent.values():
+            for key in total:
+                total[key] += totals[key]
+        total["total_tokens"] = total["input_tokens"] + total["output_tokens"]
+        return {"total": total, "by_agent": by_agent}
+
+# Usage of the whole actor run
+run_usage = TokenUsage()
+
+# Usage of the domain currently being researched
+current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("current_usage", default=None)
+
+def record_usage(agent: str, input_tokens: int, output_tokens: int, requests: int = 1,
+                 estimated: bool = False, cached: bool = False) -> None:
+    """Record tokens for the current domain, if any, and for the actor run."""
+    usage = current_usage.get()
+    if usage is not None:
+        usage.record(agent, input_tokens, output_tokens, requests=requests, estimated=estimated, cached=cached)
+    run_usage.record(agent, input_tokens, output_tokens, requests=requests, estimated=estimated, cached=cached)
+
+def record_usage_delta(before: Dict[str, Dict[str, int]], after: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """Record the usage added between two cumulative per-agent snapshots.
+
+    Args:
+        before: Snapshot mapping each agent to its input_tokens, output_tokens and requests
+        after: Later snapshot of the same counters
+
+    Returns:
+        Recorded usage of every agent that used tokens in between
+    """
+    deltas = {}
+    for agent, totals in after.items():
+        previous = before.get(agent, {})
+        delta = {key: value - previous.get(key, 0) for key, value in totals.items()}
+        if any(delta.values()):
+            record_usage(agent, delta["input_tokens"], delta["output_tokens"], requests=delta["requests"])
+            deltas[agent] = delta
+    return deltas
+
+@contextlib.contextmanager
+def track_usage() -> Iterator[TokenUsage]:
+    """Collect the usage recorded inside the block in a new TokenUsage."""
+    usage = TokenUsage()
+    token = current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        current_usage.reset(token)
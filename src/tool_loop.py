@@ -0,0 +1,77 @@
+"""Long-lived background event loop shared by the CrewAI tools.
+
+CrewAI calls tools synchronously. Instead of creating and closing a new event
+loop for every call, all tools submit their coroutines to one loop running in
+a daemon thread. HTTP connections and Apify client sessions opened on that loop
+are reused across tool calls, and the actor's own event loop is never patched
+or re-entered.
+
+Coroutines run in a copy of the submitting thread's context, so context
+variables such as the token accounting and the trace of the current research
+run stay visible to the tools.
+
+Key Functions:
+- get_tool_loop: Returns the shared loop, starting it on first use
+- run_sync: Runs a coroutine on the shared loop and blocks for its result
+- run_async: Awaits a coroutine on the shared loop from another event loop
+"""
+
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+def get_tool_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared tool event loop, starting it on first use.
+
+    Returns:
+        Event loop running forever in a daemon thread
+    """
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="tool-event-loop", daemon=True)
+            _thread.start()
+    return _loop
+
+def _in_tool_loop() -> bool:
+    return _thread is not None and threading.current_thread() is _thread
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """Run a coroutine on the shared tool loop and wait for its result.
+
+    Args:
+        coro: Coroutine to run
+        timeout: Maximum number of seconds to wait, None waits forever
+
+    Returns:
+        Result of the coroutine
+
+    Raises:
+        RuntimeError: If called from the tool loop itself, which would deadlock
+    """
+    if _in_tool_loop():
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the tool event loop, await the coroutine instead")
+    future = asyncio.run_coroutine_threadsafe(coro, get_tool_loop())
+    return future.result(timeout)
+
+async def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Await a coroutine on the shared tool loop from any event loop.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        Result of the coroutine
+    """
+    if _in_tool_loop():
+        return await coro
+    future = asyncio.run_coroutine_threadsafe(coro, get_tool_loop())
+    return await asyncio.wrap_future(future)
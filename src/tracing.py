@@ -0,0 +1,212 @@
+"""Per-stage latency and cost tracing of research runs.
+
+A trace is started for every researched domain. Code doing measurable work
+opens a span for it: each tool call, Apify run, LLM call, crew task and
+research stage. Spans record their duration and attributes such as bytes
+fetched, dataset item counts, tokens and the Apify run id, and nest under the
+span open when they start.
+
+The current trace and span live in context variables. They follow the work
+into `asyncio` tasks, `asyncio.to_thread`, CrewAI's task threads and the
+shared tool loop, which copies the caller's context for each submitted
+coroutine. Spans opened outside any trace are measured but not recorded.
+
+Key Classes:
+- Span: One timed unit of work
+- Trace: The spans of one research run
+
+Key Functions:
+- start_trace: Context manager collecting the spans of a research run
+- span: Context manager timing a unit of work in the current trace
+- add_span: Records work timed elsewhere, e.g. by a callback
+- tracing_active: Whether spans are currently recorded
+- payload_bytes: Size of a JSON payload, for the `bytes` attribute
+"""
+
+import contextlib
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.serialization import dumps_safe
+
+# Number of slowest spans listed in a trace summary
+SUMMARY_SLOWEST_SPANS = 5
+# Items serialized to estimate the size of a list payload
+PAYLOAD_SAMPLE_ITEMS = 3
+
+class Span:
+    """One timed unit of work."""
+
+    __slots__ = ("id", "parent_id", "kind", "name", "started_at", "duration", "attributes")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], kind: str, name: str, attributes: Dict):
+        self.id = span_id
+        self.parent_id = parent_id
+        self.kind = kind
+        self.name = name
+        self.started_at = time.monotonic()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes, e.g. bytes, items, tokens or run_id."""
+        self.attributes.update(attributes)
+
+class Trace:
+    """The spans of one research run."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now().isoformat()
+        self._t0 = time.monotonic()
+        self._ids = itertools.count(1)
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def new_span(self, parent_id: Optional[int], kind: str, name: str, attributes: Dict) -> Span:
+        with self._lock:
+            return Span(next(self._ids), parent_id, kind, name, attributes)
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def duration(self) -> float:
+        """Seconds since the trace started."""
+        return time.monotonic() - self._t0
+
+    def summary(self) -> Dict:
+        """Return a compact timing summary for the output record.
+
+        Returns:
+            Dict with the total duration, the count and seconds of each span
+            kind, and the slowest spans
+        """
+        with self._lock:
+            spans = list(self._spans)
+        by_kind: Dict[str, Dict] = {}
+        for span in spans:
+            stats = by_kind.setdefault(span.kind, {"count": 0, "secs": 0.0})
+            stats["count"] += 1
+            stats["secs"] += span.duration or 0
+        for stats in by_kind.values():
+            stats["secs"] = round(stats["secs"], 3)
+        slowest = sorted(spans, key=lambda span: span.duration or 0, reverse=True)[:SUMMARY_SLOWEST_SPANS]
+        return {
+            "total_secs": round(self.duration(), 3),
+            "by_kind": by_kind,
+            "slowest": [
+                {"kind": span.kind, "name": span.name, "secs": round(span.duration or 0, 3)} for span in slowest
+            ],
+        }
+
+    def to_dict(self) -> Dict:
+        """Return every span with its offset from the trace start, for the trace file."""
+        with self._lock:
+            spans = sorted(self._spans, key=lambda span: span.started_at)
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_secs": round(self.duration(), 3),
+            "spans": [
+                {
+                    "id": span.id,
+                    "parent_id": span.parent_id,
+                    "kind": span.kind,
+                    "name": span.name,
+                    "start_secs": round(span.started_at - self._t0, 3),
+                    "duration_secs": round(span.duration or 0, 3),
+                    **span.attributes,
+                }
+                for span in spans
+            ],
+        }
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def tracing_active() -> bool:
+    """Return whether spans opened now are recorded."""
+    return current_trace.get() is not None
+
+def payload_bytes(value: Any) -> int:
+    """Estimate the size of a value serialized as JSON, in bytes.
+
+    Lists are extrapolated from their first PAYLOAD_SAMPLE_ITEMS items, so a
+    large dataset is not serialized again just to be measured. Characters are
+    counted as bytes.
+    """
+    if isinstance(value, list) and len(value) > PAYLOAD_SAMPLE_ITEMS:
+        sample = value[:PAYLOAD_SAMPLE_ITEMS]
+        return len(dumps_safe(sample)) * len(value) // len(sample)
+    return len(dumps_safe(value))
+
+@contextlib.contextmanager
+def start_trace(name: str) -> Iterator[Trace]:
+    """Collect the spans opened inside the block in a new Trace.
+
+    Args:
+        name: Name of the trace, e.g. the researched domain
+    """
+    trace = Trace(name)
+    trace_token = current_trace.set(trace)
+    span_token = current_span.set(None)
+    try:
+        yield trace
+    finally:
+        current_span.reset(span_token)
+        current_trace.reset(trace_token)
+
+@contextlib.contextmanager
+def span(kind: str, name: str, **attributes: Any) -> Iterator[Span]:
+    """Time a unit of work in the current trace.
+
+    Exceptions are recorded as an `error` attribute and re-raised.
+
+    Args:
+        kind: Kind of work, e.g. "tool", "apify", "llm", "crew_task" or "stage"
+        name: Name of the unit, e.g. the tool name or actor id
+        **attributes: Initial attributes of the span
+    """
+    trace = current_trace.get()
+    parent = current_span.get()
+    if trace is None:
+        yield Span(0, None, kind, name, attributes)
+        return
+
+    entered = trace.new_span(parent.id if parent else None, kind, name, attributes)
+    token = current_span.set(entered)
+    try:
+        yield entered
+    except BaseException as e:
+        entered.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        entered.duration = time.monotonic() - entered.started_at
+        current_span.reset(token)
+        trace.add(entered)
+
+def add_span(kind: str, name: str, started_at: float, ended_at: float, trace: Optional[Trace] = None,
+             **attributes: Any) -> None:
+    """Record work that was timed elsewhere, e.g. from a completion callback.
+
+    Args:
+        kind: Kind of work
+        name: Name of the unit
+        started_at: time.monotonic() when the work started
+        ended_at: time.monotonic() when the work ended
+        trace: Trace to record in, defaults to the current trace
+        **attributes: Attributes of the span
+    """
+    trace = trace or current_trace.get()
+    if trace is None:
+        return
+    parent = current_span.get()
+    recorded = trace.new_span(parent.id if parent else None, kind, name, attributes)
+    recorded.started_at = started_at
+    recorded.duration = ended_at - started_at
+    trace.add(recorded)
@@ -0,0 +1,129 @@
+"""Process-pool worker mode for batch research.
+
+CrewAI prompt assembly, output parsing and JSON handling hold the GIL, so a
+single process cannot use more than one core however many domains are in
+flight. In worker mode, domains are spread across a pool of spawned processes.
+Each worker initializes the Actor once, keeps its own event loop, a warm
+`CompanyResearchCrew` and its own Apify and LLM clients, and researches one
+domain at a time. Results are sent back to the parent process, which merges
+them into the shared dataset. Every worker gets an equal share of the LLM and
+Apify budgets of `tools/rate_limiter.py`, so the pool as a whole stays within
+them.
+
+Local storages are not safe to write from several processes, so workers only
+read them. The records a research writes (company record, report, trace) and
+the profiles it discovered are sent back with its result and written by the
+parent. Workers exit the Actor when their process ends.
+
+Key Classes:
+- WorkerPool: Researches domains in worker processes
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from typing import Dict, Optional, Tuple
+
+from src.serialization import dumps_safe
+
+# Per-process state of a worker, set up by _init_worker
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_research_crew = None
+
+def _init_worker(mode: str, settings: Dict) -> None:
+    global _loop, _research_crew
+    # The parent process owns the local storages, never purge them
+    os.environ["CRAWLEE_PURGE_ON_START"] = "0"
+
+    from apify import Actor
+    from src.company_research_crew import CompanyResearchCrew
+    from src.result_cache import result_cache
+    from tools.llm_api import llm_cache
+    from tools.rate_limiter import rate_limiter
+
+    result_cache.enabled = settings.get("use_cache", True)
+    llm_cache.enabled = settings.get("use_llm_cache", True)
+    if settings.get("rate_limits"):
+        rate_limiter.configure(**settings["rate_limits"])
+
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    _loop.run_until_complete(Actor.init())
+    # Pool workers end through multiprocessing, which skips atexit handlers
+    Finalize(None, _exit_worker, exitpriority=10)
+    if mode == "crew":
+        _research_crew = CompanyResearchCrew(actor=Actor)
+
+def _exit_worker() -> None:
+    from apify import Actor
+
+    try:
+        _loop.run_until_complete(Actor.exit())
+    except SystemExit:
+        # Actor.exit ends the process itself, multiprocessing does that here
+        pass
+    finally:
+        _loop.close()
+
+def _research_in_worker(domain: str, profiles: Optional[Dict], options: Dict) -> Dict:
+    from apify import Actor
+    from src.main import defer_record_writes, research_domain
+    from src.profile_discovery import profile_index
+
+    try:
+        with defer_record_writes() as records:
+            response = _loop.run_until_complete(
+                research_domain(Actor, _research_crew, domain, profiles=profiles, **options)
+            )
+    except Exception as e:
+        # Exceptions of third-party libraries do not always pickle
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+    # Crew outputs and other objects are sent back as plain JSON data
+    return json.loads(dumps_safe({
+        "response": response,
+        "records": records,
+        "profiles": profile_index.get(domain),
+    }))
+
+class WorkerPool:
+    """Pool of worker processes researching one domain at a time each."""
+
+    def __init__(self, workers: int, mode: str, settings: Optional[Dict] = None):
+        """
+        Args:
+            workers: Number of worker processes
+            mode: Research mode, see research_domain
+            settings: Cache toggles of the parent process, use_cache and use_llm_cache,
+                and the worker's share of the API budgets, rate_limits
+        """
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(mode, settings or {}),
+        )
+
+    async def research(self, domain: str, profiles: Optional[Dict] = None, **options) -> Tuple[Dict, Dict, Dict]:
+        """Research a validated domain in the next free worker.
+
+        Args:
+            domain: Validated company domain name
+            profiles: Already discovered profiles
+            **options: Keyword arguments of research_domain (mode, refresh, ...)
+
+        Returns:
+            Tuple of the response of research_domain, the record store writes
+            the worker deferred, see write_records in src/main.py, and the
+            profiles known for the domain, all as plain JSON data
+        """
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, _research_in_worker, domain, profiles, options)
+        return result["response"], result["records"], result["profiles"]
+
+    async def shutdown(self) -> None:
+        """Wait for the workers to finish and stop them, each exiting its Actor."""
+        await asyncio.to_thread(self._executor.shutdown)
@@ -0,0 +1,285 @@
+"""Record/replay cassettes of Apify runs and LLM exchanges.
+
+In record mode every Apify actor call made through `run_actor`, every
+`query_llm`/`query_llm_async` request and every CrewAI agent LLM call is
+appended to a cassette file together with its latency (and, for streamed
+responses, the offset of every chunk). In replay mode the same requests are
+served from the cassettes without touching the network, either with their
+original latency or with none, so crew orchestration overhead can be profiled
+separately from network time.
+
+Cassettes are JSON Lines files in CASSETTE_DIR, one per kind of exchange:
+`apify.jsonl`, `llm.jsonl` and `crew_llm.jsonl`. Requests are matched by the
+hash of their content, timestamps excluded. Identical requests are replayed in
+recorded order, the last recording is repeated once they run out.
+
+Environment:
+- CASSETTE_MODE: "record" or "replay", unset disables cassettes
+- CASSETTE_DIR: Directory of the cassette files, defaults to cassettes
+- CASSETTE_LATENCY: "original" (default) or "zero", latency of replayed exchanges
+
+Key Classes:
+- Cassette: Records and replays exchanges
+- Recording: Captures one exchange while it happens
+- ReplayedResponse: Response object of a replayed LLM exchange
+
+Key Functions:
+- wrap_llm_call: Routes the calls of a CrewAI LLM through the cassette
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+CASSETTE_MODES = ("record", "replay")
+
+# ISO 8601 timestamps, replaced before a request is hashed
+TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?")
+
+class CassetteMiss(LookupError):
+    """Raised when a replayed request was never recorded."""
+
+class ReplayedResponse:
+    """Response of a replayed LLM exchange, with the recorded token usage."""
+
+    def __init__(self, entry: Dict):
+        usage = entry.get("usage") or {}
+        self.text = entry["response"]
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=usage.get("input_tokens", 0),
+            candidates_token_count=usage.get("output_tokens", 0),
+        )
+
+def response_usage(response: Any) -> Optional[Dict]:
+    """Read the token usage of a Gemini, OpenAI or Anthropic response, None if it has none."""
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is not None:
+        return {"input_tokens": getattr(metadata, "prompt_token_count", 0) or 0,
+                "output_tokens": getattr(metadata, "candidates_token_count", 0) or 0}
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        return {"input_tokens": getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", 0) or 0,
+                "output_tokens": getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", 0) or 0}
+    return None
+
+class Cassette:
+    """Records exchanges to cassette files and replays them."""
+
+    def __init__(self, mode: Optional[str] = None, directory: Optional[str] = None, latency: Optional[str] = None):
+        """
+        Args:
+            mode (str, optional): "record" or "replay", defaults to CASSETTE_MODE, None disables
+            directory (str, optional): Cassette directory, defaults to CASSETTE_DIR or cassettes
+            latency (str, optional): "original" or "zero" replay latency, defaults to CASSETTE_LATENCY
+        """
+        self.mode = mode if mode is not None else os.getenv('CASSETTE_MODE') or None
+        if self.mode not in (None, *CASSETTE_MODES):
+            raise ValueError(f"Invalid cassette mode: {self.mode}")
+        self.directory = Path(directory or os.getenv('CASSETTE_DIR', 'cassettes'))
+        self.zero_latency = (latency or os.getenv('CASSETTE_LATENCY', 'original')) == 'zero'
+        self.recorded = 0
+        self.replayed = 0
+        self._entries: Dict[str, Dict[str, List[Dict]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hash the parts of a request, ignoring the timestamps in it.
+
+        Prompts carry collection timestamps, a replayed run makes the same
+        requests at a different time.
+        """
+        normalized = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        normalized = TIMESTAMP_PATTERN.sub("<timestamp>", normalized)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def _path(self, kind: str) -> Path:
+        return self.directory / f"{kind}.jsonl"
+
+    def record(self, kind: str, key: str, request: Any, response: Any, latency_secs: float,
+               chunks: Optional[List] = None, usage: Optional[Dict] = None) -> None:
+        """Append one exchange to the cassette of its kind.
+
+        Args:
+            kind (str): Kind of exchange, "apify", "llm" or "crew_llm"
+            key (str): Hash the request is replayed by
+            request: Request, stored for inspection only
+            response: JSON-serializable response
+            latency_secs (float): Duration of the exchange
+            chunks (list, optional): [offset_secs, text] of each streamed chunk
+            usage (dict, optional): input_tokens and output_tokens of an LLM exchange
+        """
+        entry = {"key": key, "request": request, "response": response, "latency_secs": round(latency_secs, 4)}
+        if chunks:
+            entry["chunks"] = chunks
+        if usage:
+            entry["usage"] = usage
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self._path(kind), 'a', encoding='utf-8') as f:
+                f.write(line)
+            self.recorded += 1
+
+    def _load(self, kind: str) -> Dict[str, List[Dict]]:
+        entries = self._entries.get(kind)
+        if entries is None:
+            entries = self._entries[kind] = {}
+            try:
+                with open(self._path(kind), encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            entries.setdefault(entry["key"], []).append(entry)
+            except FileNotFoundError:
+                pass
+        return entries
+
+    def take(self, kind: str, key: str) -> Dict:
+        """Return the next recorded exchange of a request.
+
+        Raises:
+            CassetteMiss: If the request was never recorded
+        """
+        with self._lock:
+            recorded = self._load(kind).get(key)
+            if not recorded:
+                raise CassetteMiss(f"No {kind} exchange recorded for {key} in {self._path(kind)}")
+            entry = recorded.pop(0) if len(recorded) > 1 else recorded[0]
+            self.replayed += 1
+        return entry
+
+    def _delays(self, entry: Dict) -> List[tuple]:
+        """Split the latency of an exchange into (delay, chunk) steps."""
+        steps = []
+        elapsed = 0.0
+        for offset, text in entry.get("chunks") or []:
+            steps.append((max(0.0, offset - elapsed), text))
+            elapsed = max(elapsed, offset)
+        steps.append((max(0.0, entry["latency_secs"] - elapsed), None))
+        if self.zero_latency:
+            steps = [(0.0, text) for _, text in steps]
+        return steps
+
+    def play(self, entry: Dict, on_chunk: Optional[Callable[[str], None]] = None) -> Any:
+        """Wait out a recorded exchange, streaming its chunks, and return its response."""
+        for delay, text in self._delays(entry):
+            if delay:
+                time.sleep(delay)
+            if text is not None and on_chunk is not None:
+                on_chunk(text)
+        if on_chunk is not None and not entry.get("chunks") and entry["response"]:
+            on_chunk(entry["response"])
+        return entry["response"]
+
+    async def play_async(self, entry: Dict, on_chunk: Optional[Callable[[str], Any]] = None) -> Any:
+        """Same as play without blocking the event loop, on_chunk may be a coroutine function."""
+        async def emit(text: str) -> None:
+            result = on_chunk(text)
+            if inspect.isawaitable(result):
+                await result
+
+        for delay, text in self._delays(entry):
+            if delay:
+                await asyncio.sleep(delay)
+            if text is not None and on_chunk is not None:
+                await emit(text)
+        if on_chunk is not None and not entry.get("chunks") and entry["response"]:
+            await emit(entry["response"])
+        return entry["response"]
+
+    def start_recording(self, kind: str, key: str, request: Any) -> "Recording":
+        return Recording(self, kind, key, request)
+
+    def stats(self) -> Dict:
+        """Return the mode and the recorded and replayed exchange counters."""
+        return {"mode": self.mode, "recorded": self.recorded, "replayed": self.replayed}
+
+class Recording:
+    """Captures one exchange, its streamed chunks and token usage while it happens."""
+
+    def __init__(self, cassette: Cassette, kind: str, key: str, request: Any):
+        self.cassette = cassette
+        self.kind = kind
+        self.key = key
+        self.request = request
+        self.started_at = time.monotonic()
+        self.chunks: List = []
+        self.usage: Optional[Dict] = None
+
+    def wrap_chunk(self, on_chunk: Optional[Callable[[str], Any]]) -> Optional[Callable[[str], Any]]:
+        """Return on_chunk, capturing the offset of every chunk, None if on_chunk is None."""
+        if on_chunk is None:
+            return None
+
+        def capture(text: str):
+            self.chunks.append([round(time.monotonic() - self.started_at, 4), text])
+            return on_chunk(text)
+
+        return capture
+
+    def wrap_response(self, on_response: Optional[Callable[[Any], None]]) -> Callable[[Any], None]:
+        """Return on_response, capturing the token usage of the response."""
+        def capture(response: Any) -> None:
+            self.usage = response_usage(response)
+            if on_response is not None:
+                on_response(response)
+
+        return capture
+
+    def save(self, response: Any) -> None:
+        """Record the exchange with its response."""
+        self.cassette.record(self.kind, self.key, self.request, response, time.monotonic() - self.started_at,
+                             chunks=self.chunks, usage=self.usage)
+
+# Process-wide cassette used by run_actor, query_llm and the crew LLMs
+cassette = Cassette()
+
+def wrap_llm_call(llm: Any, model: str) -> Any:
+    """Route the calls of a CrewAI LLM through the cassette.
+
+    In record mode every text response is recorded with the messages it
+    answered, in replay mode the recorded response is returned without calling
+    the provider. Replayed calls spend no tokens on the LLM's usage counters.
+
+    Args:
+        llm: CrewAI LLM instance
+        model (str): Model name, part of the request hash
+
+    Returns:
+        The same LLM instance
+    """
+    if cassette.mode is None:
+        return llm
+    call = llm.call
+
+    def cassette_call(messages, *args, **kwargs):
+        key = cassette.make_key(model, messages)
+        if cassette.replaying:
+            return cassette.play(cassette.take("crew_llm", key))
+        recording = cassette.start_recording("crew_llm", key, {"model": model, "messages": messages})
+        response = call(messages, *args, **kwargs)
+        # Native tool calls are not recorded, only text responses
+        if isinstance(response, str):
+            recording.save(response)
+        return response
+
+    # LLMs are pydantic models, bypass field validation to shadow the method
+    object.__setattr__(llm, "call", cassette_call)
+    return llm
@@ -5,14 +5,35 @@ from google import genai
 # from openai import OpenAI, AzureOpenAI
 # from anthropic import Anthropic
 import argparse
+import asyncio
 import os
+import weakref
 from dotenv import load_dotenv
 from pathlib import Path
 import sys
 import base64
-from typing import Optional, Union, List
+import hashlib
+import inspect
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Union, List
 import mimetypes
 
+if not __package__ and str(Path(__file__).resolve().parent.parent) not in sys.path:
+    # Run as a script, python tools/llm_api.py
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.token_accounting import estimate_tokens
+from tools.cassette import ReplayedResponse, cassette
+from tools.rate_limiter import (
+    MAX_THROTTLE_RETRIES,
+    OUTPUT_TOKENS_ESTIMATE,
+    is_throttle_error,
+    rate_limiter,
+)
+
 def load_environment():
     """Load environment variables from .env files in order of precedence"""
     # Order of precedence:
@@ -66,6 +87,132 @@ def encode_image_file(image_path: str) -> tuple[str, str]:
         
     return encoded_string, mime_type
 
+class CachedResponse:
+    """Response served from the LLM response cache, no tokens were spent on it."""
+
+    cached = True
+
+    def __init__(self, text: str):
+        self.text = text
+
+# Fields of a company record in a prompt that hold when it was collected
+COLLECTION_TIME_PATTERN = re.compile(r'"(data_collection_date|source_timestamps)"\s*:\s*("[^"]*"|\{[^{}]*\})')
+
+class LLMResponseCache:
+    """Content-addressed, size-bounded TTL cache of LLM responses on disk.
+    
+    Every response is stored as a JSON file named after the hash of the
+    provider, model, prompt and generation parameters, with the collection
+    time of the company data in the prompt masked. The file modification time tracks the last access, the
+    least recently used files are removed once there are more than max_entries.
+    
+    The cache lives on the local disk. On the Apify platform the run's
+    filesystem is discarded when the run ends, so responses are only reused
+    within a run unless LLM_CACHE_DIR points at storage that outlives it.
+    """
+
+    def __init__(self, directory: Optional[str] = None, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        Args:
+            directory (str, optional): Cache directory, defaults to LLM_CACHE_DIR or .cache/llm
+            ttl (float, optional): Seconds a response stays valid, defaults to LLM_CACHE_TTL_SECS or 7 days
+            max_entries (int, optional): Maximum cached responses, defaults to LLM_CACHE_MAX_ENTRIES or 500
+        """
+        self.directory = Path(directory or os.getenv('LLM_CACHE_DIR', '.cache/llm'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('LLM_CACHE_TTL_SECS', 7 * 24 * 60 * 60))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('LLM_CACHE_MAX_ENTRIES', 500))
+        self.enabled = os.getenv('LLM_CACHE', '1') != '0'
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str, params: Dict) -> str:
+        """Hash the provider, model, prompt and generation parameters of a request.
+        
+        Report prompts carry the data collection date, which changes on every
+        run, so it is masked before hashing. Other dates, such as funding
+        rounds and news, stay part of the key.
+        """
+        prompt = COLLECTION_TIME_PATTERN.sub(r'"\1":"<collection time>"', prompt)
+        normalized = json.dumps(
+            {"provider": provider, "model": model, "prompt": prompt, "params": params},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if entry is None or time.time() - entry.get('created_at', 0) >= self.ttl:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry['response']
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response and evict the least recently used ones beyond max_entries."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"created_at": time.time(), "response": response}, f)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            entries = list(self.directory.glob('*.json'))
+            if len(entries) <= self.max_entries:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - self.max_entries]:
+                try:
+                    entry.unlink()
+                    self.evictions += 1
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict:
+        """Return hit, miss and eviction counters."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+# Process-wide LLM response cache used by query_llm
+llm_cache = LLMResponseCache()
+
+DEFAULT_MODELS = {
+    "openai": "gpt-4o",
+    "deepseek": "deepseek-chat",
+    "siliconflow": "deepseek-ai/DeepSeek-R1",
+    "anthropic": "claude-3-sonnet-20240229",
+    "gemini": "gemini-pro",
+    "local": "Qwen/Qwen2.5-32B-Instruct-AWQ",
+}
+
+def get_generation_params(provider: str, model: str) -> Dict:
+    """Return the generation parameters sent with a request to a provider."""
+    if provider in ["openai", "local", "deepseek", "azure", "siliconflow"]:
+        if model == "o1":
+            return {"response_format": {"type": "text"}, "reasoning_effort": "low"}
+        return {"temperature": 0.7}
+    if provider == "anthropic":
+        return {"max_tokens": 1000}
+    return {}
+
 def create_llm_client(provider="openai", google_gemini_api_key=None):
     if provider == "openai":
         api_key = os.getenv('OPENAI_API_KEY')
@@ -121,7 +268,89 @@ def create_llm_client(provider="openai", google_gemini_api_key=None):
     else:
         raise ValueError(f"Unsupported provider: {provider}")
 
-def query_llm(prompt: str, client=None, model=None, google_gemini_api_key=None, provider="openai", image_path: Optional[str] = None) -> Optional[str]:
+# Clients are created once per provider and API key and reused by every request
+_clients: Dict[tuple, Any] = {}
+# Async clients are bound to the event loop that first uses them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, Any]]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+def get_llm_client(provider="openai", google_gemini_api_key=None):
+    """
+    Return the shared client of a provider, creating it on first use.
+    
+    Args:
+        provider (str): The API provider to use
+        google_gemini_api_key (str, optional): API key for the gemini provider
+        
+    Returns:
+        The provider's client instance
+    """
+    key = (provider, google_gemini_api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = create_llm_client(provider, google_gemini_api_key=google_gemini_api_key)
+    return client
+
+def get_async_llm_client(provider="gemini", google_gemini_api_key=None):
+    """
+    Return the client used for async requests on the running event loop.
+    
+    Args:
+        provider (str): The API provider to use
+        google_gemini_api_key (str, optional): API key for the gemini provider
+        
+    Returns:
+        The provider's client instance, reused by every request on this loop
+    """
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    key = (provider, google_gemini_api_key)
+    if key not in clients:
+        clients[key] = create_llm_client(provider, google_gemini_api_key=google_gemini_api_key)
+    return clients[key]
+
+def _resolve_model(provider: str, model: Optional[str]) -> Optional[str]:
+    if model is not None:
+        return model
+    if provider == "azure":
+        return os.getenv('AZURE_OPENAI_MODEL_DEPLOYMENT', 'gpt-4o-ms')  # Get from env with fallback
+    return DEFAULT_MODELS.get(provider)
+
+def _lookup_cache(provider: str, model: str, prompt: str, params: Dict, use_cache: bool,
+                  image_path: Optional[str] = None) -> tuple:
+    # Requests with an image attachment are never cached, cassettes always
+    # hold the provider's exchanges
+    if not use_cache or not llm_cache.enabled or image_path or cassette.mode:
+        return None, None
+    cache_key = llm_cache.make_key(provider, model, prompt, params)
+    return cache_key, llm_cache.get(cache_key)
+
+def _cassette_recording(provider: str, model: str, prompt: str, params: Dict, image_path: Optional[str] = None):
+    # Requests with an image attachment are not recorded
+    if not cassette.recording or image_path:
+        return None
+    key = cassette.make_key(provider, model, prompt, params)
+    return cassette.start_recording("llm", key, {"provider": provider, "model": model, "prompt": prompt})
+
+def _cassette_entry(provider: str, model: str, prompt: str, params: Dict, image_path: Optional[str] = None):
+    if not cassette.replaying or image_path:
+        return None
+    return cassette.take("llm", cassette.make_key(provider, model, prompt, params))
+
+def _marking_chunks(on_chunk: Optional[Callable[[str], Any]], streamed: List[bool]) -> Optional[Callable[[str], Any]]:
+    """Return on_chunk, appending to streamed once a chunk reached the caller."""
+    if on_chunk is None:
+        return None
+
+    def mark(text: str):
+        streamed.append(True)
+        return on_chunk(text)
+
+    return mark
+
+def query_llm(prompt: str, client=None, model=None, google_gemini_api_key=None, provider="openai", image_path: Optional[str] = None,
+              on_response: Optional[Callable[[Any], None]] = None, use_cache: bool = True,
+              on_chunk: Optional[Callable[[str], None]] = None) -> Optional[str]:
     """
     Query an LLM with a prompt and optional image attachment.
     
@@ -131,122 +360,279 @@ def query_llm(prompt: str, client=None, model=None, google_gemini_api_key=None,
         model (str, optional): The model to use
         provider (str): The API provider to use
         image_path (str, optional): Path to an image file to attach
+        on_response (callable, optional): Called with the raw provider response,
+            e.g. to read the token usage it reports, or a CachedResponse on a cache hit
+        use_cache (bool): Serve identical requests from llm_cache, False bypasses it
+        on_chunk (callable, optional): Streams the response, called with each piece
+            of text as it arrives. Anthropic responses arrive as a single piece
         
     Returns:
         Optional[str]: The LLM's response or None if there was an error
+
+    With CASSETTE_MODE set, the exchange is recorded to or replayed from the
+    LLM cassette, see tools/cassette.py. Requests wait for the LLM budgets of
+    tools/rate_limiter.py, rate-limited requests are retried up to
+    MAX_THROTTLE_RETRIES times unless part of the response was already streamed.
     """
+    model = _resolve_model(provider, model)
+    params = get_generation_params(provider, model)
+
+    entry = _cassette_entry(provider, model, prompt, params, image_path)
+    if entry is not None:
+        text = cassette.play(entry, on_chunk)
+        if on_response is not None:
+            on_response(ReplayedResponse(entry))
+        return text
+
+    cache_key, cached = _lookup_cache(provider, model, prompt, params, use_cache, image_path)
+    if cached is not None:
+        if on_response is not None:
+            on_response(CachedResponse(cached))
+        if on_chunk is not None:
+            on_chunk(cached)
+        return cached
+
+    recording = _cassette_recording(provider, model, prompt, params, image_path)
+    if recording is not None:
+        on_response = recording.wrap_response(on_response)
+        on_chunk = recording.wrap_chunk(on_chunk)
+
     if client is None:
-        client = create_llm_client(provider, google_gemini_api_key=google_gemini_api_key)
+        client = get_llm_client(provider, google_gemini_api_key=google_gemini_api_key)
     
-    try:
-        # Set default model
-        if model is None:
-            if provider == "openai":
-                model = "gpt-4o"
-            elif provider == "azure":
-                model = os.getenv('AZURE_OPENAI_MODEL_DEPLOYMENT', 'gpt-4o-ms')  # Get from env with fallback
-            elif provider == "deepseek":
-                model = "deepseek-chat"
-            elif provider == "siliconflow":
-                model = "deepseek-ai/DeepSeek-R1"
-            elif provider == "anthropic":
-                model = "claude-3-sonnet-20240229"
-            elif provider == "gemini":
-                model = "gemini-pro"
-            elif provider == "local":
-                model = "Qwen/Qwen2.5-32B-Instruct-AWQ"
-        
-        if provider in ["openai", "local", "deepseek", "azure", "siliconflow"]:
-            messages = [{"role": "user", "content": []}]
-            
-            # Add text content
-            messages[0]["content"].append({
-                "type": "text",
-                "text": prompt
-            })
+    streamed: List[bool] = []
+    on_chunk = _marking_chunks(on_chunk, streamed)
+    estimated = estimate_tokens(prompt) + OUTPUT_TOKENS_ESTIMATE
+    retries = 0
+    while True:
+        rate_limiter.acquire_llm_sync(estimated)
+        try:
+            if provider in ["openai", "local", "deepseek", "azure", "siliconflow"]:
+                messages = [{"role": "user", "content": []}]
             
-            # Add image content if provided
-            if image_path:
-                if provider == "openai":
-                    encoded_image, mime_type = encode_image_file(image_path)
-                    messages[0]["content"] = [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{encoded_image}"}}
-                    ]
-            
-            kwargs = {
-                "model": model,
-                "messages": messages,
-                "temperature": 0.7,
-            }
+                # Add text content
+                messages[0]["content"].append({
+                    "type": "text",
+                    "text": prompt
+                })
             
-            # Add o1-specific parameters
-            if model == "o1":
-                kwargs["response_format"] = {"type": "text"}
-                kwargs["reasoning_effort"] = "low"
-                del kwargs["temperature"]
+                # Add image content if provided
+                if image_path:
+                    if provider == "openai":
+                        encoded_image, mime_type = encode_image_file(image_path)
+                        messages[0]["content"] = [
+                            {"type": "text", "text": prompt},
+                            {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{encoded_image}"}}
+                        ]
             
-            response = client.chat.completions.create(**kwargs)
-            return response.choices[0].message.content
+                kwargs = {
+                    "model": model,
+                    "messages": messages,
+                    # o1 takes response_format and reasoning_effort instead of temperature
+                    **params,
+                }
             
-        elif provider == "anthropic":
-            messages = [{"role": "user", "content": []}]
+                if on_chunk is not None:
+                    parts = []
+                    response = None
+                    stream = client.chat.completions.create(**kwargs, stream=True, stream_options={"include_usage": True})
+                    for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            parts.append(chunk.choices[0].delta.content)
+                            on_chunk(parts[-1])
+                        if getattr(chunk, "usage", None):
+                            # Usage comes with the last chunk
+                            response = chunk
+                    text = "".join(parts)
+                else:
+                    response = client.chat.completions.create(**kwargs)
+                    text = response.choices[0].message.content
+                if on_response is not None and response is not None:
+                    on_response(response)
             
-            # Add text content
-            messages[0]["content"].append({
-                "type": "text",
-                "text": prompt
-            })
+            elif provider == "anthropic":
+                messages = [{"role": "user", "content": []}]
             
-            # Add image content if provided
-            if image_path:
-                encoded_image, mime_type = encode_image_file(image_path)
+                # Add text content
                 messages[0]["content"].append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": mime_type,
-                        "data": encoded_image
-                    }
+                    "type": "text",
+                    "text": prompt
                 })
             
-            response = client.messages.create(
-                model=model,
-                max_tokens=1000,
-                messages=messages
-            )
-            return response.content[0].text
+                # Add image content if provided
+                if image_path:
+                    encoded_image, mime_type = encode_image_file(image_path)
+                    messages[0]["content"].append({
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": mime_type,
+                            "data": encoded_image
+                        }
+                    })
             
-        elif provider == "gemini":
-            # model = client.GenerativeModel(model)
-            if image_path:
-                file = genai.upload_file(image_path, mime_type="image/png")
-                chat_session = model.start_chat(
-                    history=[{
-                        "role": "user",
-                        "parts": [file, prompt]
-                    }]
-                )
-            else:
-                # chat_session = model.start_chat(
-                #     history=[{
-                #         "role": "user",
-                #         "parts": [prompt]
-                #     }]
-                # )
-                chat_session = client.chats.create(
+                response = client.messages.create(
                     model=model,
-                    # history=[{
-                    #     "role": "user",
-                    #     "parts": [prompt]
-                    # }]
+                    messages=messages,
+                    **params
                 )
-            response = chat_session.send_message(message=prompt)
-            return response.text
+                if on_response is not None:
+                    on_response(response)
+                text = response.content[0].text
+                if on_chunk is not None:
+                    on_chunk(text)
             
-    except Exception as e:
-        print(f"Error querying LLM: {e}", file=sys.stderr)
-        return None
+            elif provider == "gemini":
+                # model = client.GenerativeModel(model)
+                if image_path:
+                    file = genai.upload_file(image_path, mime_type="image/png")
+                    chat_session = model.start_chat(
+                        history=[{
+                            "role": "user",
+                            "parts": [file, prompt]
+                        }]
+                    )
+                    response = chat_session.send_message(message=prompt)
+                    text = response.text
+                elif on_chunk is not None:
+                    parts = []
+                    response = None
+                    for response in client.models.generate_content_stream(model=model, contents=prompt):
+                        if response.text:
+                            parts.append(response.text)
+                            on_chunk(response.text)
+                    text = "".join(parts)
+                else:
+                    # Single-turn prompts need no chat session
+                    response = client.models.generate_content(model=model, contents=prompt)
+                    text = response.text
+                # Streamed responses report the usage of the whole generation in the last chunk
+                if on_response is not None and response is not None:
+                    on_response(response)
+            
+        except Exception as e:
+            # Retry rate limits once the limiter has cut the budgets and waits out
+            # the backoff, but never a stream the caller already got chunks of
+            if is_throttle_error(e):
+                rate_limiter.llm_throttled(e)
+                if retries < MAX_THROTTLE_RETRIES and not streamed:
+                    retries += 1
+                    continue
+            print(f"Error querying LLM: {e}", file=sys.stderr)
+            return None
+        break
+    rate_limiter.llm_succeeded(estimated, estimate_tokens(prompt) + estimate_tokens(text or ""))
+
+    if cache_key is not None and text:
+        llm_cache.set(cache_key, text)
+    if recording is not None and text:
+        recording.save(text)
+    return text
+
+async def _emit_chunk(on_chunk: Callable[[str], Any], text: str) -> None:
+    result = on_chunk(text)
+    if inspect.isawaitable(result):
+        await result
+
+async def query_llm_async(prompt: str, model=None, google_gemini_api_key=None, provider="gemini",
+                          on_response: Optional[Callable[[Any], None]] = None, use_cache: bool = True,
+                          on_chunk: Optional[Callable[[str], Any]] = None) -> Optional[str]:
+    """
+    Query an LLM without blocking the event loop.
+    
+    Gemini requests use the async client of the running loop with a single-shot
+    generate_content call, so many requests can be in flight at once. Other
+    providers run query_llm on a worker thread with their shared client.
+    
+    Args:
+        prompt (str): The text prompt to send
+        model (str, optional): The model to use
+        google_gemini_api_key (str, optional): API key for the gemini provider
+        provider (str): The API provider to use
+        on_response (callable, optional): Called with the raw provider response,
+            or a CachedResponse on a cache hit
+        use_cache (bool): Serve identical requests from llm_cache, False bypasses it
+        on_chunk (callable, optional): Streams the response, called (and awaited if it
+            returns an awaitable) with each piece of text as it arrives. Providers
+            other than Gemini deliver the whole response as a single piece
+        
+    Returns:
+        Optional[str]: The LLM's response or None if there was an error
+
+    Requests wait for the LLM budgets of tools/rate_limiter.py without blocking
+    the loop, rate-limited requests are retried as in query_llm. Response cache
+    lookups and writes run on a worker thread.
+    """
+    if provider != "gemini":
+        text = await asyncio.to_thread(
+            query_llm, prompt, model=model, provider=provider, on_response=on_response, use_cache=use_cache
+        )
+        if on_chunk is not None and text:
+            await _emit_chunk(on_chunk, text)
+        return text
+
+    model = _resolve_model(provider, model)
+    params = get_generation_params(provider, model)
+    entry = _cassette_entry(provider, model, prompt, params)
+    if entry is not None:
+        text = await cassette.play_async(entry, on_chunk)
+        if on_response is not None:
+            on_response(ReplayedResponse(entry))
+        return text
+
+    # The response cache reads and writes files, keep that off the loop
+    cache_key, cached = await asyncio.to_thread(_lookup_cache, provider, model, prompt, params, use_cache)
+    if cached is not None:
+        if on_response is not None:
+            on_response(CachedResponse(cached))
+        if on_chunk is not None:
+            await _emit_chunk(on_chunk, cached)
+        return cached
+
+    recording = _cassette_recording(provider, model, prompt, params)
+    if recording is not None:
+        on_response = recording.wrap_response(on_response)
+        on_chunk = recording.wrap_chunk(on_chunk)
+
+    streamed: List[bool] = []
+    on_chunk = _marking_chunks(on_chunk, streamed)
+    estimated = estimate_tokens(prompt) + OUTPUT_TOKENS_ESTIMATE
+    retries = 0
+    while True:
+        await rate_limiter.acquire_llm(estimated)
+        try:
+            client = get_async_llm_client(provider, google_gemini_api_key=google_gemini_api_key)
+            if on_chunk is not None:
+                parts = []
+                response = None
+                async for response in await client.aio.models.generate_content_stream(model=model, contents=prompt):
+                    if response.text:
+                        parts.append(response.text)
+                        await _emit_chunk(on_chunk, response.text)
+                text = "".join(parts)
+            else:
+                response = await client.aio.models.generate_content(model=model, contents=prompt)
+                text = response.text
+            if on_response is not None and response is not None:
+                on_response(response)
+        except Exception as e:
+            # Retry rate limits once the limiter has cut the budgets and waits out
+            # the backoff, but never a stream the caller already got chunks of
+            if is_throttle_error(e):
+                rate_limiter.llm_throttled(e)
+                if retries < MAX_THROTTLE_RETRIES and not streamed:
+                    retries += 1
+                    continue
+            print(f"Error querying LLM: {e}", file=sys.stderr)
+            return None
+        break
+    rate_limiter.llm_succeeded(estimated, estimate_tokens(prompt) + estimate_tokens(text or ""))
+
+    if cache_key is not None and text:
+        await asyncio.to_thread(llm_cache.set, cache_key, text)
+    if recording is not None and text:
+        recording.save(text)
+    return text
 
 def main():
     parser = argparse.ArgumentParser(description='Query an LLM with a prompt')
@@ -254,6 +640,7 @@ def main():
     parser.add_argument('--provider', choices=['openai','anthropic','gemini','local','deepseek','azure','siliconflow'], default='openai', help='The API provider to use')
     parser.add_argument('--model', type=str, help='The model to use (default depends on provider)')
     parser.add_argument('--image', type=str, help='Path to an image file to attach to the prompt')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the LLM response cache')
     args = parser.parse_args()
 
     if not args.model:
@@ -271,7 +658,8 @@ def main():
             args.model = os.getenv('AZURE_OPENAI_MODEL_DEPLOYMENT', 'gpt-4o-ms')  # Get from env with fallback
 
     client = create_llm_client(args.provider)
-    response = query_llm(args.prompt, client, model=args.model, provider=args.provider, image_path=args.image)
+    response = query_llm(args.prompt, client, model=args.model, provider=args.provider, image_path=args.image,
+                         use_cache=not args.no_cache)
     if response:
         print(response)
     else:
@@ -0,0 +1,396 @@
+"""Process-wide adaptive rate limiting of Apify runs and LLM calls.
+
+One limiter is shared by every caller in the process: `run_actor` on any
+event loop, `query_llm`/`query_llm_async` and the CrewAI agent LLMs on their
+worker threads. It keeps three budgets:
+
+- LLM requests per minute and LLM tokens per minute, as token buckets. A
+  caller reserves its request and estimated tokens up front and waits until
+  the buckets can pay for them. The estimate is corrected once the response
+  is in.
+- Concurrent Apify runs, as a slot count held from the start of a run until
+  it finishes.
+
+Callers are slowed down rather than failed. When a provider answers with a
+rate limit (429) or the platform rejects a run over the memory limit, the
+budget is cut (halved for the buckets, one slot less for runs), new calls are
+paused for a backoff and the call is retried, up to MAX_THROTTLE_RETRIES
+times. A rejection that outlasts the retries, e.g. an exhausted daily quota,
+fails the call. Successful calls grow the budget back to its configured
+maximum.
+
+Environment:
+- LLM_REQUESTS_PER_MIN: LLM request budget, defaults to 100, 0 disables it
+- LLM_TOKENS_PER_MIN: LLM token budget, defaults to 1000000, 0 disables it
+- APIFY_MAX_CONCURRENT_RUNS: Concurrent Apify run budget, defaults to 8, 0 disables it
+
+Key Classes:
+- TokenBucket: Adaptive thread-safe token bucket
+- ConcurrencyLimit: Adaptive slot count usable from any thread and event loop
+- RateLimiter: The budgets of the process
+
+Key Functions:
+- is_throttle_error: Whether an exception is a rate limit or capacity rejection
+- limit_llm_call: Routes the calls of a CrewAI LLM through the limiter
+"""
+
+import asyncio
+import contextlib
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional
+
+from src.token_accounting import estimate_tokens
+
+# Seconds new calls are paused after the first throttle signal, doubled for
+# every further signal in a row up to MAX_BACKOFF_SECS
+BASE_BACKOFF_SECS = 5
+MAX_BACKOFF_SECS = 60
+# A cut budget never goes below this share of its maximum
+MIN_RATE_SHARE = 0.1
+# Successful calls needed to add back one Apify run slot
+RUN_SLOT_RECOVERY_STARTS = 10
+# Retries of a call rejected by a rate or capacity limit, about three minutes
+# of backoff in total before the rejection is raised
+MAX_THROTTLE_RETRIES = 5
+# Output tokens reserved for an LLM call before its response is known
+OUTPUT_TOKENS_ESTIMATE = 1000
+
+def is_throttle_error(error: BaseException) -> bool:
+    """Return whether an exception is a rate limit or capacity rejection.
+
+    Recognizes HTTP 429 responses of the Apify, Gemini, OpenAI and Anthropic
+    clients, litellm's RateLimitError, Gemini's RESOURCE_EXHAUSTED and Apify
+    run starts rejected over the account's memory limit.
+    """
+    for attribute in ("status_code", "code", "status"):
+        if getattr(error, attribute, None) == 429:
+            return True
+    error_type = str(getattr(error, "type", "") or "")
+    if "rate-limit" in error_type or "memory-limit" in error_type:
+        return True
+    if "RateLimit" in type(error).__name__:
+        return True
+    return "RESOURCE_EXHAUSTED" in str(error)
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts to throttle signals.
+
+    Callers reserve tokens and are told how long to wait before using them.
+    The balance may go negative, later callers then wait for it to refill, so
+    waiters are served in reservation order without a queue.
+    """
+
+    def __init__(self, per_minute: float):
+        """
+        Args:
+            per_minute (float): Maximum refill rate and capacity, 0 disables the bucket
+        """
+        self.max_rate = per_minute / 60
+        self.rate = self.max_rate
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.paused_until = 0.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_rate > 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """Take tokens and return the seconds to wait before using them."""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def adjust(self, amount: float) -> None:
+        """Take (or give back, if negative) tokens without waiting, e.g. to correct an estimate."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def throttle(self, pause_secs: float) -> None:
+        """Halve the refill rate and pause new reservations."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.max_rate * MIN_RATE_SHARE, self.rate / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + pause_secs)
+
+    def recover(self) -> None:
+        """Grow the refill rate back towards its maximum after a successful call."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 50)
+
+class ConcurrencyLimit:
+    """Adaptive count of slots shared by threads and event loops.
+
+    Waiters on any event loop are woken through their own loop, so the slots
+    bound the work of every loop in the process together.
+    """
+
+    def __init__(self, max_slots: int):
+        """
+        Args:
+            max_slots (int): Maximum number of slots, 0 disables the limit
+        """
+        self.max_slots = max_slots
+        self.slots = max_slots
+        self.active = 0
+        self.paused_until = 0.0
+        self._successes = 0
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_slots > 0
+
+    async def acquire(self) -> None:
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                pause = self.paused_until - time.monotonic()
+                if pause <= 0 and self.active < self.slots:
+                    self.active += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            if pause > 0:
+                # Woken early by a release or at the end of the pause, whichever comes first
+                loop.call_later(pause, _resolve, waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass on a wake-up this task can no longer use
+                with self._lock:
+                    self._wake()
+                raise
+
+    def release(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.active -= 1
+            self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            loop, waiter = self._waiters.popleft()
+            if not loop.is_closed() and not waiter.done():
+                loop.call_soon_threadsafe(_resolve, waiter)
+                return
+
+    def throttle(self, pause_secs: float) -> None:
+        """Remove one slot and pause new acquisitions."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.slots = max(1, min(self.slots, self.active) - 1)
+            self.paused_until = max(self.paused_until, time.monotonic() + pause_secs)
+            self._successes = 0
+
+    def recover(self) -> None:
+        """Add back a slot after RUN_SLOT_RECOVERY_STARTS successful starts."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._successes += 1
+            if self._successes >= RUN_SLOT_RECOVERY_STARTS and self.slots < self.max_slots:
+                self.slots += 1
+                self._successes = 0
+                self._wake()
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+class RateLimiter:
+    """LLM request, LLM token and concurrent Apify run budgets of the process."""
+
+    def __init__(self, llm_requests_per_min: Optional[float] = None, llm_tokens_per_min: Optional[float] = None,
+                 apify_max_concurrent_runs: Optional[int] = None):
+        """
+        Args:
+            llm_requests_per_min (float, optional): Defaults to LLM_REQUESTS_PER_MIN or 100
+            llm_tokens_per_min (float, optional): Defaults to LLM_TOKENS_PER_MIN or 1000000
+            apify_max_concurrent_runs (int, optional): Defaults to APIFY_MAX_CONCURRENT_RUNS or 8
+        """
+        self.configure(
+            llm_requests_per_min if llm_requests_per_min is not None
+            else float(os.getenv('LLM_REQUESTS_PER_MIN', 100)),
+            llm_tokens_per_min if llm_tokens_per_min is not None
+            else float(os.getenv('LLM_TOKENS_PER_MIN', 1_000_000)),
+            apify_max_concurrent_runs if apify_max_concurrent_runs is not None
+            else int(os.getenv('APIFY_MAX_CONCURRENT_RUNS', 8)),
+        )
+
+    def configure(self, llm_requests_per_min: float, llm_tokens_per_min: float, apify_max_concurrent_runs: int) -> None:
+        """Replace the budgets, e.g. with a worker process's share of them."""
+        self.llm_requests = TokenBucket(llm_requests_per_min)
+        self.llm_tokens = TokenBucket(llm_tokens_per_min)
+        self.apify_runs = ConcurrencyLimit(apify_max_concurrent_runs)
+        self.waits = 0
+        self.wait_secs = 0.0
+        self.throttles = 0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+    def limits(self, share: int = 1) -> Dict:
+        """Return the configured budgets divided into share equal parts."""
+        return {
+            "llm_requests_per_min": self.llm_requests.max_rate * 60 / share,
+            "llm_tokens_per_min": self.llm_tokens.max_rate * 60 / share,
+            "apify_max_concurrent_runs": max(1, self.apify_runs.max_slots // share) if self.apify_runs.enabled else 0,
+        }
+
+    def _count_wait(self, wait_secs: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_secs += wait_secs
+
+    def _llm_wait(self, estimated_tokens: int) -> float:
+        wait = max(self.llm_requests.reserve(1), self.llm_tokens.reserve(estimated_tokens))
+        if wait > 0:
+            self._count_wait(wait)
+        return wait
+
+    async def acquire_llm(self, estimated_tokens: int) -> None:
+        """Wait until the LLM budgets can pay for a request."""
+        wait = self._llm_wait(estimated_tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_llm_sync(self, estimated_tokens: int) -> None:
+        """Same as acquire_llm, blocking the calling thread."""
+        wait = self._llm_wait(estimated_tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def llm_succeeded(self, estimated_tokens: int, used_tokens: int) -> None:
+        """Correct the token estimate of a finished request and grow the budgets back."""
+        self.llm_tokens.adjust(used_tokens - estimated_tokens)
+        self.llm_requests.recover()
+        self.llm_tokens.recover()
+        self._consecutive_throttles = 0
+
+    def _backoff(self, error: BaseException) -> float:
+        with self._lock:
+            self.throttles += 1
+            self._consecutive_throttles += 1
+            backoff = min(MAX_BACKOFF_SECS, BASE_BACKOFF_SECS * 2 ** (self._consecutive_throttles - 1))
+        return _retry_after(error) or backoff * random.uniform(0.5, 1.5)
+
+    def llm_throttled(self, error: BaseException) -> None:
+        """Cut the LLM budgets after a rate limit, the retry waits in acquire_llm."""
+        pause = self._backoff(error)
+        self.llm_requests.throttle(pause)
+        self.llm_tokens.throttle(pause)
+
+    def apify_throttled(self, error: BaseException) -> float:
+        """Cut the Apify run budget after a rejected start.
+
+        Returns:
+            Seconds to wait before starting the run again
+        """
+        pause = self._backoff(error)
+        self.apify_runs.throttle(pause)
+        return pause
+
+    def apify_started(self) -> None:
+        """Grow the Apify run budget back after a successful start."""
+        self.apify_runs.recover()
+        self._consecutive_throttles = 0
+
+    @contextlib.asynccontextmanager
+    async def apify_run(self) -> AsyncIterator[None]:
+        """Hold one concurrent Apify run slot."""
+        started = time.monotonic()
+        await self.apify_runs.acquire()
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self._count_wait(waited)
+        try:
+            yield
+        finally:
+            self.apify_runs.release()
+
+    def stats(self) -> Dict:
+        """Return the wait and throttle counters and the current budgets."""
+        return {
+            "waits": self.waits,
+            "wait_secs": round(self.wait_secs, 3),
+            "throttles": self.throttles,
+            "llm_requests_per_min": round(self.llm_requests.rate * 60, 1),
+            "llm_tokens_per_min": round(self.llm_tokens.rate * 60),
+            "apify_concurrent_runs": self.apify_runs.slots,
+        }
+
+# Process-wide limiter used by run_actor, query_llm and the crew LLMs
+rate_limiter = RateLimiter()
+
+def limit_llm_call(llm: Any) -> Any:
+    """Route the calls of a CrewAI LLM through the limiter.
+
+    Each call waits for the LLM budgets, and calls rejected with a rate limit
+    cut the budgets and are retried up to MAX_THROTTLE_RETRIES times.
+
+    Args:
+        llm: CrewAI LLM instance
+
+    Returns:
+        The same LLM instance
+    """
+    call = llm.call
+
+    def limited_call(messages, *args, **kwargs):
+        estimated = estimate_tokens(str(messages)) + OUTPUT_TOKENS_ESTIMATE
+        retries = 0
+        while True:
+            rate_limiter.acquire_llm_sync(estimated)
+            try:
+                response = call(messages, *args, **kwargs)
+            except Exception as e:
+                if not is_throttle_error(e):
+                    raise
+                rate_limiter.llm_throttled(e)
+                if retries >= MAX_THROTTLE_RETRIES:
+                    raise
+                retries += 1
+                continue
+            used = estimated - OUTPUT_TOKENS_ESTIMATE + estimate_tokens(str(response or ""))
+            rate_limiter.llm_succeeded(estimated, used)
+            return response
+
+    # LLMs are pydantic models, bypass field validation to shadow the method
+    object.__setattr__(llm, "call", limited_call)
+    return llm